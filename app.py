@@ -7,8 +7,12 @@ in a polished, interactive web interface.
 Run:  streamlit run app.py
 """
 
+import hashlib
+import importlib
 import os
 import tempfile
+import threading
+import time
 import streamlit as st
 
 # ----- Page config --------------------
@@ -71,6 +75,10 @@ section[data-testid="stFileUploader"] {
 )
 
 
+# Root directory for per-upload vector stores, keyed by content hash
+CHAT_CHROMA_DIR = "chat_chroma_db"
+
+
 # ----- Session state defaults ----------
 def _init_state():
     defaults = {
@@ -78,11 +86,17 @@ def _init_state():
         "vectorstore": None,
         "ingested": False,
         "ingested_filename": None,
+        "ingested_hash": None,
     }
     for k, v in defaults.items():
         if k not in st.session_state:
             st.session_state[k] = v
 
+    # Per-session semantic cache — answers depend on this session's document
+    if "semantic_cache" not in st.session_state:
+        from src.app.semantic_cache import SemanticCache
+        st.session_state.semantic_cache = SemanticCache()
+
 
 _init_state()
 
@@ -90,17 +104,91 @@ _init_state()
 # ----- Helper: read memory file ----------
 import re
 
-def _read_memory_file(path: str) -> str:
-    """Return the content of a memory markdown file, stripping HTML comments."""
+_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+
+
+@st.cache_data(show_spinner=False)
+def _read_memory_file(path: str, mtime: float) -> str:
+    """
+    Return the content of a memory markdown file, stripping HTML comments.
+
+    `mtime` is only part of the cache key, so unchanged files are served
+    from cache across reruns and any write invalidates the entry.
+    """
     if not os.path.exists(path):
         return ""
     with open(path, "r") as f:
         content = f.read()
     # Strip multi-line HTML comments  <!-- ... -->
-    content = re.sub(r"<!--.*?-->", "", content, flags=re.DOTALL)
+    content = _COMMENT_RE.sub("", content)
     return content.strip()
 
 
+def _memory_mtime(path: str) -> float:
+    """Return the file's mtime, or 0.0 if it doesn't exist."""
+    return os.path.getmtime(path) if os.path.exists(path) else 0.0
+
+
+# ----- Helper: render a streamed answer ----------
+STREAM_FLUSH_INTERVAL_S = 0.05  # ~20 UI updates per second
+
+
+def _render_stream(stream, placeholder) -> dict:
+    """
+    Render text deltas into a placeholder, coalescing UI updates.
+
+    Deltas are buffered and flushed at most every STREAM_FLUSH_INTERVAL_S
+    so long answers don't trigger one re-render per token.
+
+    Args:
+        stream: Iterator from generate_answer(..., stream=True).
+        placeholder: An st.empty() container to write into.
+
+    Returns:
+        The final result dict yielded at the end of the stream.
+    """
+    buf = []
+    last = time.monotonic()
+    result = None
+
+    for delta in stream:
+        if isinstance(delta, dict):
+            result = delta
+            break
+        buf.append(delta)
+        now = time.monotonic()
+        if now - last >= STREAM_FLUSH_INTERVAL_S:
+            placeholder.markdown("".join(buf))
+            last = now
+
+    if result is None:
+        result = {"answer": "".join(buf), "citations": [], "sources_used": []}
+    return result
+
+
+# ----- Helper: warm up chat-time imports ----------
+_CHAT_MODULES = (
+    "src.app.generation.generator",
+    "src.app.memory",
+    "src.app.routing.router",
+    "src.app.retrieval.retriever",
+)
+
+
+def _prewarm():
+    """
+    Import chat-time modules on a background thread.
+
+    Runs after ingestion so the transitive import cost overlaps with the
+    user typing their first message instead of landing inside the spinner.
+    """
+    def _load():
+        for name in _CHAT_MODULES:
+            importlib.import_module(name)
+
+    threading.Thread(target=_load, daemon=True).start()
+
+
 # ----- Sidebar ----------
 with st.sidebar:
     st.markdown("## 🤖 Chatbot")
@@ -118,37 +206,60 @@ with st.sidebar:
     
     st.caption("Max file size: 25 MB")
 
+    upload_hash = (
+        hashlib.sha256(uploaded.getvalue()).hexdigest()[:16] if uploaded else None
+    )
+
     if uploaded and (
         not st.session_state.ingested
-        or st.session_state.ingested_filename != uploaded.name
+        or st.session_state.ingested_hash != upload_hash
     ):
         with st.status("📥 Ingesting document...", expanded=True) as status:
             st.write(f"**File:** {uploaded.name}")
-            st.write("Parsing PDF...")
 
-            # Save uploaded file to temp location
-            with tempfile.NamedTemporaryFile(
-                delete=False, suffix=".pdf"
-            ) as tmp:
-                tmp.write(uploaded.getvalue())
-                tmp_path = tmp.name
+            # One vector store per distinct file content
+            persist_dir = os.path.join(CHAT_CHROMA_DIR, upload_hash)
 
             try:
-                from src.app.ingestion.pipeline import run_ingestion_pipeline
+                vectorstore = None
+                if os.path.isdir(persist_dir):
+                    from src.app.ingestion.indexer import load_vector_store
+
+                    st.write("Loading previously indexed copy...")
+                    vectorstore = load_vector_store(persist_dir=persist_dir)
+                    if vectorstore._collection.count() == 0:
+                        vectorstore = None  # incomplete earlier run — rebuild
+
+                if vectorstore is None:
+                    from src.app.ingestion.pipeline import run_ingestion_pipeline
+
+                    st.write("Parsing PDF...")
+
+                    # Save uploaded file to temp location
+                    with tempfile.NamedTemporaryFile(
+                        delete=False, suffix=".pdf"
+                    ) as tmp:
+                        tmp.write(uploaded.getvalue())
+                        tmp_path = tmp.name
+
+                    try:
+                        st.write("Chunking & summarizing...")
+                        vectorstore = run_ingestion_pipeline(
+                            tmp_path, persist_dir=persist_dir
+                        )
+                    finally:
+                        os.unlink(tmp_path)
 
-                st.write("Chunking & summarizing...")
-                vectorstore = run_ingestion_pipeline(
-                    tmp_path, persist_dir="chat_chroma_db"
-                )
                 st.session_state.vectorstore = vectorstore
                 st.session_state.ingested = True
                 st.session_state.ingested_filename = uploaded.name
+                st.session_state.ingested_hash = upload_hash
+                st.session_state.semantic_cache.clear()
+                _prewarm()
                 status.update(label="✅ Ready to chat!", state="complete")
             except Exception as e:
                 status.update(label="❌ Ingestion failed", state="error")
                 st.error(str(e))
-            finally:
-                os.unlink(tmp_path)
 
     if st.session_state.ingested:
         st.markdown(
@@ -168,8 +279,8 @@ with st.sidebar:
 
     from src.app.config import USER_MEMORY_PATH, COMPANY_MEMORY_PATH
 
-    user_mem = _read_memory_file(USER_MEMORY_PATH)
-    comp_mem = _read_memory_file(COMPANY_MEMORY_PATH)
+    user_mem = _read_memory_file(USER_MEMORY_PATH, _memory_mtime(USER_MEMORY_PATH))
+    comp_mem = _read_memory_file(COMPANY_MEMORY_PATH, _memory_mtime(COMPANY_MEMORY_PATH))
 
     with st.expander("👤 User Memory", expanded=bool(user_mem)):
         if user_mem:
@@ -192,6 +303,7 @@ with st.sidebar:
                         f"<!-- {'User' if 'USER' in path else 'Company'} "
                         f"memory — managed by the memory system -->\n"
                     )
+        st.session_state.semantic_cache.clear()
         st.toast("🧹 Memory cleared!", icon="✅")
         st.rerun()
 
@@ -238,37 +350,63 @@ if prompt := st.chat_input("Ask a question..."):
 
     # Generate response
     with st.chat_message("assistant"):
+        placeholder = st.empty()
+
         with st.spinner("Thinking..."):
+            cache = st.session_state.semantic_cache
+
+            # Step 0: Serve near-identical repeat questions from cache
+            cached = cache.lookup(prompt)
+
+            if cached is None:
+                from src.app.routing.router import route_query
+
+                # Step 1: Route the query
+                route = route_query(prompt, has_vectorstore=bool(st.session_state.vectorstore))
+
+                # Step 2: Handle each route
+                docs = []
+                if route == "document_search":
+                    # Retrieve from documents
+                    from src.app.retrieval.retriever import get_retriever, retrieve
+                    retriever = get_retriever(st.session_state.vectorstore)
+                    docs = retrieve(retriever, prompt)
+                    mode = "rag"
+                elif route == "memory_lookup":
+                    # Answer from memory
+                    mode = "memory"
+                else:  # route == "general"
+                    # Conversational answer
+                    mode = "general"
+
+        if cached is not None:
+            answer = cached["answer"]
+            citations = cached["citations"]
+            # The same turn was already processed for memory
+            mem_result = {"memory_saved": False}
+        else:
             from src.app.generation.generator import generate_answer
             from src.app.memory import process_memory
-            from src.app.routing.router import route_query
-
-            # Step 1: Route the query
-            route = route_query(prompt, has_vectorstore=bool(st.session_state.vectorstore))
-
-            # Step 2: Handle each route
-            docs = []
-            if route == "document_search":
-                # Retrieve from documents
-                from src.app.retrieval.retriever import get_retriever, retrieve
-                retriever = get_retriever(st.session_state.vectorstore)
-                docs = retrieve(retriever, prompt)
-                result = generate_answer(prompt, docs, mode="rag")
-            elif route == "memory_lookup":
-                # Answer from memory
-                result = generate_answer(prompt, [], mode="memory")
-            else:  # route == "general"
-                # Conversational answer
-                result = generate_answer(prompt, [], mode="general")
 
+            # Step 3: Stream the answer into the placeholder
+            result = _render_stream(
+                generate_answer(prompt, docs, mode=mode, stream=True),
+                placeholder,
+            )
             answer = result["answer"]
             citations = result["citations"]
 
             # Memory
-            mem_result = process_memory(prompt, answer)
+            with st.spinner("Updating memory..."):
+                mem_result = process_memory(prompt, answer)
+
+            # New facts can change memory-based answers — start fresh
+            if mem_result.get("memory_saved"):
+                cache.clear()
+            cache.put(prompt, {"answer": answer, "citations": citations})
 
-        # Display answer
-        st.markdown(answer)
+        # Display final answer (citation markers stripped)
+        placeholder.markdown(answer)
 
         # Display citations
         if citations:
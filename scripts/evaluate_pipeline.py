@@ -7,19 +7,31 @@ Runs a set of evaluation queries against the TinyLoRA PDF and measures:
   - Latency: retrieval + generation times
 
 Usage:
-    python scripts/evaluate_pipeline.py
+    python scripts/evaluate_pipeline.py [--clean] [--llm-cache]
+
+The PDF index is cached under .pdf_index_cache/ and reused across runs
+(shared with scripts/run_sanity.py); pass --clean to delete it afterwards.
+The on-disk answer cache is off unless --llm-cache is given, so every run
+re-measures generation.
 
 Output:
     artifacts/eval_metrics.json
 """
-import json
+import argparse
 import os
 import re
 import shutil
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+import ahocorasick
+import orjson
 
-from src.app.ingestion.pipeline import run_ingestion_pipeline
-from src.app.retrieval.retriever import get_retriever, retrieve, format_context
+from src.app.config import PDF_INDEX_CACHE_DIR
+from src.app.ingestion.indexer import log_exact_count
+from src.app.ingestion.pipeline import run_cached_ingestion_pipeline, get_index_cache_dir
+from src.app.retrieval.retriever import get_retriever, retrieve_batch
+from src.app.generation import cache as llm_cache
 from src.app.generation.generator import generate_answer
 from src.app.logger import get_logger
 
@@ -76,7 +88,7 @@ EVAL_SET = [
 ]
 
 # Refusal indicator phrases
-REFUSAL_PHRASES = [
+REFUSAL_PHRASES = (
     "i don't have",
     "i cannot find",
     "not found in",
@@ -89,23 +101,31 @@ REFUSAL_PHRASES = [
     "don't have enough information",
     "not in the uploaded",
     "outside the scope",
-]
+)
+
+# Compiled once — reused for every evaluated answer
+_CITE_RE = re.compile(r"\[Source:\s*.+?,\s*Chunk\s*\d+\]")
+
+# Aho–Corasick automaton over all phrases — one linear scan per answer
+_REFUSAL_AC = ahocorasick.Automaton()
+for _phrase in REFUSAL_PHRASES:
+    _REFUSAL_AC.add_word(_phrase, _phrase)
+_REFUSAL_AC.make_automaton()
 
 
 def _has_citations(answer: str) -> bool:
     """Check if the answer contains citation markers."""
-    return bool(re.findall(r"\[Source:\s*.+?,\s*Chunk\s*\d+\]", answer))
+    return _CITE_RE.search(answer) is not None
 
 
 def _count_citations(answer: str) -> int:
     """Count unique citation markers in the answer."""
-    return len(set(re.findall(r"\[Source:\s*.+?,\s*Chunk\s*\d+\]", answer)))
+    return len(set(_CITE_RE.findall(answer)))
 
 
 def _is_refusal(answer: str) -> bool:
     """Check if the answer is a refusal / graceful decline."""
-    lower = answer.lower()
-    return any(phrase in lower for phrase in REFUSAL_PHRASES)
+    return next(_REFUSAL_AC.iter(answer.lower()), None) is not None
 
 
 def _keyword_hit_rate(answer: str, keywords: list[str]) -> float:
@@ -117,37 +137,114 @@ def _keyword_hit_rate(answer: str, keywords: list[str]) -> float:
     return hits / len(keywords)
 
 
-def _retrieval_hit(docs, expected_source: str) -> bool:
+def _retrieval_hit(sources: list, expected_source: str) -> bool:
     """Check if at least one retrieved doc matches the expected source."""
-    if expected_source is None:
-        return True  # unanswerable — no source expectation
-    return any(
-        doc.metadata.get("source") == expected_source for doc in docs
-    )
+    # unanswerable (None) — no source expectation
+    return expected_source is None or expected_source in sources
 
 
-def _mrr(docs, expected_source: str) -> float:
+def _mrr(sources: list, expected_source: str) -> float:
     """Mean Reciprocal Rank — rank of the first relevant doc (1-indexed)."""
     if expected_source is None:
         return 1.0
-    for i, doc in enumerate(docs, 1):
-        if doc.metadata.get("source") == expected_source:
+    for i, source in enumerate(sources, 1):
+        if source == expected_source:
             return 1.0 / i
     return 0.0
 
 
-def run_evaluation(pdf_path: str, persist_dir: str = "eval_chroma_db") -> dict:
+def _evaluate_one(
+    item: dict,
+    docs: list,
+    retrieval_time: float,
+) -> tuple[dict, float, float]:
+    """
+    Run a single eval question through generation and score it.
+
+    Args:
+        item: One entry from EVAL_SET.
+        docs: Documents retrieved for this question.
+        retrieval_time: This question's share of the batched retrieval time.
+
+    Returns:
+        Tuple of (per-question result dict, retrieval time, generation time).
+    """
+    qid = item["id"]
+    query = item["query"]
+    q_type = item["type"]
+    logger.info(f"\n{'─' * 50}")
+    logger.info(f"📝 [{qid}] ({q_type}): {query}")
+
+    # Generation
+    t1 = time.time()
+    answer_result = generate_answer(query, docs)
+    generation_time = time.time() - t1
+
+    answer = answer_result["answer"]
+    citations = answer_result["citations"]
+
+    # --- Metrics per question ---
+    has_cites = _has_citations(answer)
+    cite_count = _count_citations(answer)
+    is_refusal = _is_refusal(answer)
+    kw_hit = _keyword_hit_rate(answer, item["expected_keywords"])
+    sources = [doc.metadata.get("source") for doc in docs]
+    ret_hit = _retrieval_hit(sources, item["expected_source"])
+    mrr_score = _mrr(sources, item["expected_source"])
+
+    # Correctness criteria
+    if q_type == "answerable":
+        correct = has_cites and kw_hit >= 0.5 and not is_refusal
+    else:  # unanswerable
+        correct = is_refusal and cite_count == 0
+
+    result = {
+        "id": qid,
+        "query": query,
+        "type": q_type,
+        "answer_preview": answer[:300],
+        "metrics": {
+            "correct": correct,
+            "has_citations": has_cites,
+            "citation_count": cite_count,
+            "is_refusal": is_refusal,
+            "keyword_hit_rate": round(kw_hit, 2),
+            "retrieval_hit": ret_hit,
+            "mrr": round(mrr_score, 2),
+            "retrieval_time_s": round(retrieval_time, 3),
+            "generation_time_s": round(generation_time, 3),
+            "docs_retrieved": len(docs),
+        },
+    }
+
+    status = "✅" if correct else "❌"
+    logger.info(
+        f"   {status} correct={correct} | cites={cite_count} | "
+        f"kw_hit={kw_hit:.0%} | refusal={is_refusal} | "
+        f"retrieval={retrieval_time:.2f}s | generation={generation_time:.2f}s"
+    )
+
+    return result, retrieval_time, generation_time
+
+
+def run_evaluation(
+    pdf_path: str,
+    cache_dir: str = PDF_INDEX_CACHE_DIR,
+    clean: bool = False,
+) -> dict:
     """
     Run the full evaluation pipeline.
 
     1. Ingest the PDF
-    2. Run each eval question through retrieval + generation
-    3. Compute aggregate metrics
-    4. Return structured results
+    2. Retrieve for all eval questions in one batched query
+    3. Run each question through generation (concurrently)
+    4. Compute aggregate metrics
+    5. Return structured results
 
     Args:
         pdf_path: Path to the test PDF.
-        persist_dir: Temp directory for vector store.
+        cache_dir: Root directory for cached PDF indexes.
+        clean: If True, delete this PDF's cached index after the run.
 
     Returns:
         Dict with per-question results and aggregate metrics.
@@ -158,86 +255,39 @@ def run_evaluation(pdf_path: str, persist_dir: str = "eval_chroma_db") -> dict:
 
     # --- Step 1: Ingest ---
     logger.info(f"📥 Ingesting: {pdf_path}")
-    vectorstore = run_ingestion_pipeline(
+    vectorstore = run_cached_ingestion_pipeline(
         pdf_path,
-        persist_dir=persist_dir,
+        cache_dir=cache_dir,
         extract_images=True,
     )
-    doc_count = vectorstore._collection.count()
-    logger.info(f"📊 Indexed {doc_count} chunks")
+    doc_count = log_exact_count(vectorstore)
 
     retriever = get_retriever(vectorstore, top_k=5)
 
-    # --- Step 2: Evaluate each question ---
+    # --- Step 2: Retrieve for all questions in one batched query ---
+    queries = [item["query"] for item in EVAL_SET]
+    t0 = time.time()
+    batched_docs = retrieve_batch(retriever, queries)
+    per_query_retrieval_time = (time.time() - t0) / len(queries)
+
+    # --- Step 3: Evaluate each question ---
+    # Generation is I/O-bound (LLM), so run questions concurrently;
+    # executor.map preserves EVAL_SET order in the results.
     results = []
     total_retrieval_time = 0
     total_generation_time = 0
 
-    for item in EVAL_SET:
-        qid = item["id"]
-        query = item["query"]
-        q_type = item["type"]
-        logger.info(f"\n{'─' * 50}")
-        logger.info(f"📝 [{qid}] ({q_type}): {query}")
-
-        # Retrieval
-        t0 = time.time()
-        docs = retrieve(retriever, query)
-        retrieval_time = time.time() - t0
-
-        # Generation
-        t1 = time.time()
-        answer_result = generate_answer(query, docs)
-        generation_time = time.time() - t1
-
-        answer = answer_result["answer"]
-        citations = answer_result["citations"]
-
-        # --- Metrics per question ---
-        has_cites = _has_citations(answer)
-        cite_count = _count_citations(answer)
-        is_refusal = _is_refusal(answer)
-        kw_hit = _keyword_hit_rate(answer, item["expected_keywords"])
-        ret_hit = _retrieval_hit(docs, item["expected_source"])
-        mrr_score = _mrr(docs, item["expected_source"])
-
-        # Correctness criteria
-        if q_type == "answerable":
-            correct = has_cites and kw_hit >= 0.5 and not is_refusal
-        else:  # unanswerable
-            correct = is_refusal and cite_count == 0
-
-        result = {
-            "id": qid,
-            "query": query,
-            "type": q_type,
-            "answer_preview": answer[:300],
-            "metrics": {
-                "correct": correct,
-                "has_citations": has_cites,
-                "citation_count": cite_count,
-                "is_refusal": is_refusal,
-                "keyword_hit_rate": round(kw_hit, 2),
-                "retrieval_hit": ret_hit,
-                "mrr": round(mrr_score, 2),
-                "retrieval_time_s": round(retrieval_time, 3),
-                "generation_time_s": round(generation_time, 3),
-                "docs_retrieved": len(docs),
-            },
-        }
-        results.append(result)
-
-        total_retrieval_time += retrieval_time
-        total_generation_time += generation_time
-
-        status = "✅" if correct else "❌"
-        logger.info(
-            f"   {status} correct={correct} | cites={cite_count} | "
-            f"kw_hit={kw_hit:.0%} | refusal={is_refusal} | "
-            f"retrieval={retrieval_time:.2f}s | generation={generation_time:.2f}s"
+    with ThreadPoolExecutor(max_workers=len(EVAL_SET)) as executor:
+        outcomes = executor.map(
+            lambda pair: _evaluate_one(pair[0], pair[1], per_query_retrieval_time),
+            zip(EVAL_SET, batched_docs),
         )
+        for result, retrieval_time, generation_time in outcomes:
+            results.append(result)
+            total_retrieval_time += retrieval_time
+            total_generation_time += generation_time
 
-    # --- Step 3: Aggregate metrics ---
+    # --- Step 4: Aggregate metrics ---
     answerable = [r for r in results if r["type"] == "answerable"]
     unanswerable = [r for r in results if r["type"] == "unanswerable"]
     n = len(results)
@@ -294,8 +344,8 @@ def run_evaluation(pdf_path: str, persist_dir: str = "eval_chroma_db") -> dict:
     # --- Save ---
     os.makedirs("artifacts", exist_ok=True)
     output_path = "artifacts/eval_metrics.json"
-    with open(output_path, "w") as f:
-        json.dump(output, f, indent=2)
+    with open(output_path, "wb") as f:
+        f.write(orjson.dumps(output, option=orjson.OPT_INDENT_2))
 
     logger.info(f"\n{'=' * 60}")
     logger.info(f"📊 EVALUATION SUMMARY")
@@ -308,12 +358,25 @@ def run_evaluation(pdf_path: str, persist_dir: str = "eval_chroma_db") -> dict:
     logger.info(f"  Avg latency:         {aggregate['latency']['avg_total_s']}s")
     logger.info(f"\n💾 Results saved to: {output_path}")
 
-    # Cleanup
-    shutil.rmtree(persist_dir, ignore_errors=True)
-    logger.info("🧹 Temp vector store cleaned up")
+    # Cleanup (opt-in — the cached index is reused by later runs)
+    if clean:
+        shutil.rmtree(
+            get_index_cache_dir(pdf_path, cache_dir, extract_images=True),
+            ignore_errors=True,
+        )
+        logger.info("🧹 Cached vector store cleaned up")
 
     return output
 
 
 if __name__ == "__main__":
-    run_evaluation("sample_docs/TinyLoRA_2602.04118v1.pdf")
+    parser = argparse.ArgumentParser(description="Evaluate the RAG pipeline.")
+    parser.add_argument(
+        "--clean", action="store_true", help="delete the cached PDF index afterwards"
+    )
+    parser.add_argument(
+        "--llm-cache", action="store_true", help="reuse answers from the on-disk LLM cache"
+    )
+    args = parser.parse_args()
+    llm_cache.LLM_CACHE_ENABLED = args.llm_cache
+    run_evaluation("sample_docs/TinyLoRA_2602.04118v1.pdf", clean=args.clean)
@@ -3,16 +3,25 @@ Sanity check script for the Agentic RAG Chatbot.
 
 It performs a minimal end-to-end RAG flow and writes
 the required `artifacts/sanity_output.json`.
+
+The PDF index is cached under .pdf_index_cache/ and reused across runs
+(shared with scripts/evaluate_pipeline.py); pass --clean to delete it.
+The on-disk answer cache is off unless --llm-cache is given, so every run
+re-checks generation and refusals.
 """
-import json
+import argparse
 import os
 import shutil
 
+import ahocorasick
+import orjson
+
 # ---------------------------------------------------------------------------
 # Import pipeline modules
 # ---------------------------------------------------------------------------
-from src.app.ingestion.pipeline import run_ingestion_pipeline
+from src.app.ingestion.pipeline import run_cached_ingestion_pipeline, get_index_cache_dir
 from src.app.retrieval.retriever import get_retriever, retrieve
+from src.app.generation import cache as llm_cache
 from src.app.generation.generator import generate_answer
 from src.app.memory import process_memory
 from src.app.logger import get_logger
@@ -25,9 +34,6 @@ logger = get_logger(__name__)
 # Use the sample PDF
 PDF_PATH = "sample_docs/TinyLoRA_2602.04118v1.pdf"
 
-# Temporary vector store — cleaned up at the end.
-SANITY_DB = "sanity_chroma_db"
-
 # Output path that verify_output.py and sanity_check.sh expect.
 OUTPUT_PATH = "artifacts/sanity_output.json"
 
@@ -47,8 +53,20 @@ UNANSWERABLE_QUESTIONS = [
     "What was the GDP of France in 2019?",
 ]
 
+# Phrases that indicate the LLM correctly declined to answer
+REFUSAL_PHRASES = (
+    "i don't have", "i cannot find", "not found",
+    "no relevant", "not covered", "cannot answer",
+    "not mentioned", "no information", "don't have enough",
+)
+# Aho–Corasick automaton over all phrases — one linear scan per answer
+_REFUSAL_AC = ahocorasick.Automaton()
+for _phrase in REFUSAL_PHRASES:
+    _REFUSAL_AC.add_word(_phrase, _phrase)
+_REFUSAL_AC.make_automaton()
+
 
-def run_sanity():
+def run_sanity(clean: bool = False):
     """
     Execute a minimal end-to-end RAG flow and write the output JSON.
 
@@ -57,7 +75,10 @@ def run_sanity():
         2. For each question → retrieve relevant chunks → generate answer
         3. Format results into the schema verify_output.py expects
         4. Write artifacts/sanity_output.json
-        5. Clean up temp vector store
+        5. Optionally clean up the cached vector store
+
+    Args:
+        clean: If True, delete the cached PDF index after the run.
     """
     logger.info("=" * 60)
     logger.info("🔍 SANITY CHECK — Starting end-to-end RAG flow")
@@ -66,11 +87,11 @@ def run_sanity():
     # ------------------------------------------------------------------
     # Step 1: Ingest the PDF
     # ------------------------------------------------------------------
-    # This calls parse → chunk → index, the full Feature A pipeline.
+    # This calls parse → chunk → index, the full Feature A pipeline,
+    # unless an index for this exact PDF is already cached.
     logger.info(f"📥 Ingesting: {PDF_PATH}")
-    vectorstore = run_ingestion_pipeline(
+    vectorstore = run_cached_ingestion_pipeline(
         PDF_PATH,
-        persist_dir=SANITY_DB,
         extract_images=True,
     )
     logger.info("✅ Ingestion complete")
@@ -137,12 +158,7 @@ def run_sanity():
         result = generate_answer(question, docs)
 
         # Check if the LLM correctly refused
-        answer_lower = result["answer"].lower()
-        refused = any(phrase in answer_lower for phrase in [
-            "i don't have", "i cannot find", "not found",
-            "no relevant", "not covered", "cannot answer",
-            "not mentioned", "no information", "don't have enough",
-        ])
+        refused = next(_REFUSAL_AC.iter(result["answer"].lower()), None) is not None
 
         refusal_results.append({
             "question": question,
@@ -177,30 +193,19 @@ def run_sanity():
 
     # Build memory_writes from what was actually written to the files.
     # verify_output.py expects: [{target: "USER"|"COMPANY", summary: "..."}]
-    memory_writes = []
-
     from src.app.memory import read_memory
     from src.app.config import USER_MEMORY_PATH, COMPANY_MEMORY_PATH
 
     user_mem_content = read_memory(USER_MEMORY_PATH)
     company_mem_content = read_memory(COMPANY_MEMORY_PATH)
 
-    # Extract bullet-point facts from the memory files
-    for line in user_mem_content.splitlines():
-        line = line.strip()
-        if line.startswith("- "):
-            memory_writes.append({
-                "target": "USER",
-                "summary": line[2:].strip(),
-            })
-
-    for line in company_mem_content.splitlines():
-        line = line.strip()
-        if line.startswith("- "):
-            memory_writes.append({
-                "target": "COMPANY",
-                "summary": line[2:].strip(),
-            })
+    # Extract bullet-point facts from the memory files in a single pass
+    memory_writes = []
+    for target, content in (("USER", user_mem_content), ("COMPANY", company_mem_content)):
+        for raw in content.splitlines():
+            line = raw.strip()
+            if line.startswith("- "):
+                memory_writes.append({"target": target, "summary": line[2:].strip()})
 
     logger.info(f"  📝 Total memory_writes for output: {len(memory_writes)}")
 
@@ -223,21 +228,31 @@ def run_sanity():
     # Step 7: Write the output file
     # ------------------------------------------------------------------
     os.makedirs("artifacts", exist_ok=True)
-    with open(OUTPUT_PATH, "w") as f:
-        json.dump(output, f, indent=2)
+    with open(OUTPUT_PATH, "wb") as f:
+        f.write(orjson.dumps(output, option=orjson.OPT_INDENT_2))
 
     logger.info(f"\n💾 Output written to: {OUTPUT_PATH}")
 
     # ------------------------------------------------------------------
-    # Step 8: Cleanup temp vector store
+    # Step 8: Cleanup cached vector store (opt-in)
     # ------------------------------------------------------------------
-    # Don't want sanity_chroma_db committed to the repo.
-    shutil.rmtree(SANITY_DB, ignore_errors=True)
-    logger.info("🧹 Temp vector store cleaned up")
+    # The cache is gitignored; keeping it lets later runs skip ingestion.
+    if clean:
+        shutil.rmtree(get_index_cache_dir(PDF_PATH), ignore_errors=True)
+        logger.info("🧹 Cached vector store cleaned up")
 
     logger.info("\n✅ SANITY CHECK PASSED")
     return output
 
 
 if __name__ == "__main__":
-    run_sanity()
+    parser = argparse.ArgumentParser(description="Run the end-to-end sanity check.")
+    parser.add_argument(
+        "--clean", action="store_true", help="delete the cached PDF index afterwards"
+    )
+    parser.add_argument(
+        "--llm-cache", action="store_true", help="reuse answers from the on-disk LLM cache"
+    )
+    args = parser.parse_args()
+    llm_cache.LLM_CACHE_ENABLED = args.llm_cache
+    run_sanity(clean=args.clean)
@@ -32,24 +32,61 @@ LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
 
 # --- Embeddings ---
 EMBEDDING_MODEL = "models/gemini-embedding-001"
+EMBED_BATCH_SIZE = 100     # texts per embedding request
+EMBED_MAX_CONCURRENCY = 8  # in-flight embedding requests
 
 # --- ChromaDB ---
 CHROMA_PERSIST_DIR = "chroma_db"
 CHROMA_COLLECTION_NAME = "arxiv_papers"
+PDF_INDEX_CACHE_DIR = ".pdf_index_cache"
+INDEX_BATCH_SIZE = 1000    # documents per Chroma add call
+INDEX_MAX_WORKERS = 4      # concurrent Chroma add calls
+
+# HNSW index parameters — applied only when a collection is first created
+HNSW_M = 32                          # graph degree
+HNSW_CONSTRUCTION_EF = 200           # candidate list size while inserting
+HNSW_SEARCH_EF = 64                  # candidate list size while querying
+HNSW_NUM_THREADS = os.cpu_count() or 1
+
+# --- Streaming directory ingestion ---
+INGEST_QUEUE_MAXSIZE = 2     # in-flight items between pipeline stages
+INGEST_DOC_BATCH_SIZE = 64   # documents per micro-batch sent to the embed stage
+UPSERT_BATCH_SIZE = 200      # documents per Chroma add in the upsert stage
 
 # --- Chunking ---
 CHUNK_MAX_CHARACTERS = 1500
 CHUNK_NEW_AFTER_N_CHARS = 1000
 CHUNK_OVERLAP = 100
+# Chunk inside partition_pdf (one pass) instead of a separate chunk_by_title
+CHUNK_DURING_PARTITION = os.getenv("CHUNK_DURING_PARTITION", "true").lower() == "true"
+
+# --- Multimodal summarization ---
+SUMMARY_MAX_CONCURRENCY = 4       # in-flight summary requests
+SUMMARY_REQUESTS_PER_SECOND = 1.0  # rate limit for summary requests
+SUMMARY_BATCH_SIZE = 8            # multimodal chunks per summary request
 
 # --- Retrieval ---
 TOP_K = 5
 
+# --- Semantic Cache ---
+SEMANTIC_CACHE_THRESHOLD = 0.92
+SEMANTIC_CACHE_MAX_SIZE = 1000
+
 # --- Memory ---
 USER_MEMORY_PATH = "USER_MEMORY.md"
 COMPANY_MEMORY_PATH = "COMPANY_MEMORY.md"
 MEMORY_CONFIDENCE_THRESHOLD = 0.7
+MEMORY_DEDUP_WINDOW_BYTES = 256 * 1024  # tail of the file scanned for duplicates
 
 # --- Paths ---
 SAMPLE_DOCS_DIR = "sample_docs"
 ARTIFACTS_DIR = "artifacts"
+ORIGINALS_DB_NAME = "originals.sqlite"  # kept inside each index's persist dir
+
+# --- LLM response cache ---
+LLM_CACHE_DIR = os.path.join(ARTIFACTS_DIR, "llm_cache")
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+
+# --- Embedding cache ---
+EMBEDDING_CACHE_PATH = os.path.join(ARTIFACTS_DIR, "embeddings.sqlite")
+EMBEDDING_CACHE_MEMORY_SIZE = 4096  # vectors held in the in-process LRU
@@ -0,0 +1,71 @@
+"""
+On-disk cache of RAG answers keyed by the exact prompt sent to the LLM.
+
+The key hashes the provider/model, the final system prompt (which already
+contains the retrieved context), and the user query, so an identical
+(query, context) pair is answered without another LLM call.
+"""
+import hashlib
+
+from diskcache import Cache
+
+from src.app.config import (
+    LLM_CACHE_DIR,
+    LLM_CACHE_ENABLED,
+    LLM_PROVIDER,
+    LLM_MODEL,
+    GROQ_MODEL,
+)
+from src.app.logger import get_logger
+
+logger = get_logger(__name__)
+
+_cache: Cache | None = None
+
+
+def _get_cache() -> Cache:
+    """Return the shared disk cache, opening it on first use."""
+    global _cache
+    if _cache is None:
+        _cache = Cache(LLM_CACHE_DIR)
+    return _cache
+
+
+def make_key(system_prompt: str, query: str) -> str:
+    """Return the cache key for a (system prompt, query) pair."""
+    model = GROQ_MODEL if LLM_PROVIDER == "groq" else LLM_MODEL
+    payload = "\x00".join([LLM_PROVIDER, model, system_prompt, query])
+    return hashlib.blake2b(payload.encode("utf-8")).hexdigest()
+
+
+def get_cached(system_prompt: str, query: str) -> dict | None:
+    """
+    Look up a cached answer.
+
+    Args:
+        system_prompt: The fully formatted system prompt.
+        query: The user's question.
+
+    Returns:
+        The cached result dict, or None on a miss (or if caching is off).
+    """
+    if not LLM_CACHE_ENABLED:
+        return None
+    result = _get_cache().get(make_key(system_prompt, query))
+    if result is not None:
+        logger.info("🗃️ LLM cache hit")
+    return result
+
+
+def set_cached(system_prompt: str, query: str, result: dict) -> None:
+    """
+    Store an answer for a (system prompt, query) pair.
+
+    Args:
+        system_prompt: The fully formatted system prompt.
+        query: The user's question.
+        result: The answer dict to cache.
+    """
+    if not LLM_CACHE_ENABLED:
+        return
+    _get_cache().set(make_key(system_prompt, query), result)
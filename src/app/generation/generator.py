@@ -9,10 +9,14 @@ context, with structured citations. Supports three modes:
 """
 import re
 import os
+import threading
+import time
+from collections import OrderedDict
 
 from langchain_core.documents import Document
 from langchain_core.messages import HumanMessage, SystemMessage
 
+from src.app.generation.cache import get_cached, set_cached
 from src.app.generation.prompts import (
     RAG_SYSTEM_PROMPT,
     MEMORY_ANSWER_PROMPT,
@@ -25,29 +29,71 @@ from src.app.config import USER_MEMORY_PATH, COMPANY_MEMORY_PATH
 
 logger = get_logger(__name__)
 
+# Compiled once at import — used on every generated answer
+# Leading whitespace is part of the match so stripping leaves clean text
+_CITATION_RE = re.compile(r"\s*\[Source:\s*(.+?),\s*Chunk\s*(\d+)\]")
+
+
+def _strip_html_comments(text: str) -> str:
+    """
+    Remove <!-- ... --> comments with a forward str.find scan.
+
+    Like the non-greedy DOTALL regex it replaces, an unterminated comment
+    is left in place.
+    """
+    parts = []
+    pos = 0
+    while True:
+        start = text.find("<!--", pos)
+        if start < 0:
+            break
+        end = text.find("-->", start + 4)
+        if end < 0:
+            break
+        parts.append(text[pos:start])
+        pos = end + 3
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+# Stripped memory file contents keyed by path -> (mtime_ns, content)
+_MEM_CACHE: dict[str, tuple[int, str]] = {}
+
 
 def _read_memory_file(path: str) -> str:
     """
     Read memory from a file, stripping HTML comments.
-    
+
+    Results are cached by the file's mtime, so unchanged files are served
+    from memory without re-reading or re-stripping.
+
     Args:
         path: Path to the memory file (USER_MEMORY_PATH or COMPANY_MEMORY_PATH).
     
     Returns:
         The memory content, or empty string if file doesn't exist.
     """
-    if not os.path.exists(path):
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
         return ""
+
+    cached = _MEM_CACHE.get(path)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+
     try:
         with open(path, "r") as f:
             content = f.read()
         # Strip multi-line HTML comments
-        content = re.sub(r"<!--.*?-->", "", content, flags=re.DOTALL)
-        return content.strip()
+        content = _strip_html_comments(content).strip()
     except Exception as e:
         logger.warning(f"Failed to read memory file {path}: {e}")
         return ""
 
+    _MEM_CACHE[path] = (mtime_ns, content)
+    return content
+
 
 def _format_memory_context() -> str:
     """
@@ -71,6 +117,57 @@ def _format_memory_context() -> str:
     return "\n\n".join(parts)
 
 
+def _split_citations(answer_text: str) -> tuple[str, list[tuple[str, int]]]:
+    """
+    Strip citation markers and collect their references.
+
+    Args:
+        answer_text: The LLM's generated answer.
+
+    Returns:
+        Tuple of (answer with markers removed, unique (source, chunk_id)
+        pairs in order of first appearance).
+    """
+    # Refusals and general chatter carry no markers — skip both scans
+    if "[Source:" not in answer_text:
+        return answer_text.strip(), []
+
+    # One finditer pass: collect each reference and the text between markers
+    refs = []
+    pieces = []
+    last = 0
+    for match in _CITATION_RE.finditer(answer_text):
+        refs.append((match[1].strip(), int(match[2])))
+        pieces.append(answer_text[last:match.start()])
+        last = match.end()
+    pieces.append(answer_text[last:])
+
+    return "".join(pieces).strip(), list(dict.fromkeys(refs))
+
+
+def _resolve_citations(
+    refs: list[tuple[str, int]], docs: list[Document]
+) -> list[dict]:
+    """Map (source, chunk_id) references to citation dicts with snippets."""
+    # Index docs once; the first doc wins if a key appears more than once
+    doc_index = {}
+    for doc in docs:
+        key = (doc.metadata.get("source"), doc.metadata.get("chunk_id"))
+        doc_index.setdefault(key, doc)
+
+    # refs are already deduped (dict.fromkeys in _split_citations)
+    return [
+        {
+            "source": source,
+            "chunk_id": chunk_id,
+            "snippet": doc.page_content[:200] if doc else "",
+        }
+        for (source, chunk_id), doc in (
+            (ref, doc_index.get(ref)) for ref in refs
+        )
+    ]
+
+
 def _extract_citations(answer_text: str, docs: list[Document]) -> list[dict]:
     """
     Extract citation references from the answer text.
@@ -85,75 +182,66 @@ def _extract_citations(answer_text: str, docs: list[Document]) -> list[dict]:
     Returns:
         List of citation dicts with source, chunk_id, and snippet.
     """
-    pattern = r"\[Source:\s*(.+?),\s*Chunk\s*(\d+)\]"
-    matches = re.findall(pattern, answer_text)
+    _, refs = _split_citations(answer_text)
+    return _resolve_citations(refs, docs)
 
-    citations = []
-    seen = set()
 
-    for source, chunk_id_str in matches:
-        key = (source.strip(), int(chunk_id_str))
-        if key in seen:
-            continue
-        seen.add(key)
+# ---------------------------------------------------------------------------
+# Shared message builders and post-processing
+# ---------------------------------------------------------------------------
 
-        # Find the matching document
-        snippet = ""
-        for doc in docs:
-            if (doc.metadata.get("source") == key[0] and
-                    doc.metadata.get("chunk_id") == key[1]):
-                snippet = doc.page_content[:200]
-                break
+# Formatted RAG system prompts keyed by the retrieved set, LRU-evicted.
+# Guarded by a lock: answers are generated from several threads at once.
+_PROMPT_CACHE: OrderedDict[tuple, str] = OrderedDict()
+_PROMPT_CACHE_MAX_SIZE = 128
+_PROMPT_CACHE_LOCK = threading.Lock()
 
-        citations.append({
-            "source": key[0],
-            "chunk_id": key[1],
-            "snippet": snippet,
-        })
 
-    return citations
+def _rag_system_prompt(context_docs: list[Document]) -> str:
+    """
+    Return the RAG system prompt for a set of retrieved documents.
 
-@timer
-def generate_rag_answer(query: str, context_docs: list[Document]) -> dict:
+    Multi-turn sessions often retrieve the same top-k for follow-up
+    questions, so the formatted prompt is memoized by the identity of the
+    docs — (source, chunk_id, page_content) in order.
     """
-    Generate a grounded answer with citations from retrieved documents.
+    key = tuple(
+        (doc.metadata.get("source"), doc.metadata.get("chunk_id"), doc.page_content)
+        for doc in context_docs
+    )
+    with _PROMPT_CACHE_LOCK:
+        system_prompt = _PROMPT_CACHE.get(key)
+        if system_prompt is not None:
+            _PROMPT_CACHE.move_to_end(key)
+            return system_prompt
 
-    Args:
-        query: The user's question.
-        context_docs: Retrieved documents providing context.
+    # Format the context with citation markers and inject it into the prompt
+    system_prompt = RAG_SYSTEM_PROMPT.format(context=format_context(context_docs))
 
-    Returns:
-        Dict with keys:
-          - answer: The generated answer text.
-          - citations: List of citation dicts.
-          - sources_used: List of unique source filenames.
-    """
-    llm = get_llm()
+    with _PROMPT_CACHE_LOCK:
+        _PROMPT_CACHE[key] = system_prompt
+        if len(_PROMPT_CACHE) > _PROMPT_CACHE_MAX_SIZE:
+            _PROMPT_CACHE.popitem(last=False)
+    return system_prompt
 
-    # Format the context with citation markers
-    context = format_context(context_docs)
 
-    # Build the system prompt with context injected
-    system_prompt = RAG_SYSTEM_PROMPT.format(context=context)
+def _build_rag_messages(query: str, context_docs: list[Document]) -> list:
+    """Build the RAG prompt messages with the formatted context injected."""
+    system_prompt = _rag_system_prompt(context_docs)
 
-    messages = [
+    return [
         SystemMessage(content=system_prompt),
         HumanMessage(content=query),
     ]
 
-    logger.info(f"🤖 Generating RAG answer for: {query}")
-    response = llm.invoke(messages)
-    log_token_usage(response)
-    answer_text = response.content
 
-    # Extract structured citations
-    citations = _extract_citations(answer_text, context_docs)
+def _finalize_rag_answer(answer_text: str, context_docs: list[Document]) -> dict:
+    """Extract citations from a raw RAG answer and strip the inline markers."""
+    # Strip inline citation markers and extract structured citations
+    clean_answer, refs = _split_citations(answer_text)
+    citations = _resolve_citations(refs, context_docs)
     sources_used = list({c["source"] for c in citations})
 
-    # Strip inline citation markers so the displayed answer is clean
-    clean_answer = re.sub(r"\s*\[Source:\s*.+?,\s*Chunk\s*\d+\]", "", answer_text)
-    clean_answer = clean_answer.strip()
-
     logger.info(
         f"✅ RAG answer generated with {len(citations)} citation(s) "
         f"from {len(sources_used)} source(s)"
@@ -166,6 +254,72 @@ def generate_rag_answer(query: str, context_docs: list[Document]) -> dict:
     }
 
 
+def _build_memory_messages(query: str) -> list:
+    """Build the memory-mode prompt messages from stored memory."""
+    # Retrieve stored memory
+    memory_context = _format_memory_context()
+    system_prompt = MEMORY_ANSWER_PROMPT.format(memory_context=memory_context)
+
+    return [
+        SystemMessage(content=system_prompt),
+        HumanMessage(content=query),
+    ]
+
+
+def _build_general_messages(query: str) -> list:
+    """Build the general-mode prompt messages."""
+    return [
+        SystemMessage(content=GENERAL_ANSWER_PROMPT),
+        HumanMessage(content=query),
+    ]
+
+
+def _finalize_plain_answer(answer_text: str) -> dict:
+    """Wrap a memory/general answer in the standard result dict."""
+    return {
+        "answer": answer_text.strip(),
+        "citations": [],
+        "sources_used": [],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Mode-specific generators
+# ---------------------------------------------------------------------------
+
+@timer
+def generate_rag_answer(query: str, context_docs: list[Document]) -> dict:
+    """
+    Generate a grounded answer with citations from retrieved documents.
+
+    Args:
+        query: The user's question.
+        context_docs: Retrieved documents providing context.
+
+    Returns:
+        Dict with keys:
+          - answer: The generated answer text.
+          - citations: List of citation dicts.
+          - sources_used: List of unique source filenames.
+    """
+    messages = _build_rag_messages(query, context_docs)
+    system_prompt = messages[0].content
+
+    cached = get_cached(system_prompt, query)
+    if cached is not None:
+        return cached
+
+    llm = get_llm()
+
+    logger.info(f"🤖 Generating RAG answer for: {query}")
+    response = llm.invoke(messages)
+    log_token_usage(response)
+
+    result = _finalize_rag_answer(response.content, context_docs)
+    set_cached(system_prompt, query, result)
+    return result
+
+
 @timer
 def generate_memory_answer(query: str) -> dict:
     """
@@ -181,28 +335,14 @@ def generate_memory_answer(query: str) -> dict:
           - sources_used: Empty list.
     """
     llm = get_llm()
-
-    # Retrieve stored memory
-    memory_context = _format_memory_context()
-    system_prompt = MEMORY_ANSWER_PROMPT.format(memory_context=memory_context)
-
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=query),
-    ]
+    messages = _build_memory_messages(query)
 
     logger.info(f"🧠 Generating memory-based answer for: {query}")
     response = llm.invoke(messages)
     log_token_usage(response)
-    answer_text = response.content.strip()
 
     logger.info("✅ Memory answer generated")
-
-    return {
-        "answer": answer_text,
-        "citations": [],
-        "sources_used": [],
-    }
+    return _finalize_plain_answer(response.content)
 
 
 @timer
@@ -220,28 +360,193 @@ def generate_general_answer(query: str) -> dict:
           - sources_used: Empty list.
     """
     llm = get_llm()
-
-    messages = [
-        SystemMessage(content=GENERAL_ANSWER_PROMPT),
-        HumanMessage(content=query),
-    ]
+    messages = _build_general_messages(query)
 
     logger.info(f"💬 Generating general answer for: {query}")
     response = llm.invoke(messages)
     log_token_usage(response)
-    answer_text = response.content.strip()
 
     logger.info("✅ General answer generated")
+    return _finalize_plain_answer(response.content)
 
-    return {
-        "answer": answer_text,
-        "citations": [],
-        "sources_used": [],
-    }
+
+@timer
+async def generate_rag_answer_async(query: str, context_docs: list[Document]) -> dict:
+    """
+    Async variant of generate_rag_answer() using `llm.ainvoke`.
+
+    Args:
+        query: The user's question.
+        context_docs: Retrieved documents providing context.
+
+    Returns:
+        Same dict as generate_rag_answer().
+    """
+    messages = _build_rag_messages(query, context_docs)
+    system_prompt = messages[0].content
+
+    cached = get_cached(system_prompt, query)
+    if cached is not None:
+        return cached
+
+    llm = get_llm()
+
+    logger.info(f"🤖 Generating RAG answer (async) for: {query}")
+    response = await llm.ainvoke(messages)
+    log_token_usage(response)
+
+    result = _finalize_rag_answer(response.content, context_docs)
+    set_cached(system_prompt, query, result)
+    return result
 
 
 @timer
-def generate_answer(query: str, context_docs: list[Document], mode: str = "rag") -> dict:
+async def generate_memory_answer_async(query: str) -> dict:
+    """
+    Async variant of generate_memory_answer() using `llm.ainvoke`.
+
+    Args:
+        query: The user's question.
+
+    Returns:
+        Same dict as generate_memory_answer().
+    """
+    llm = get_llm()
+    messages = _build_memory_messages(query)
+
+    logger.info(f"🧠 Generating memory-based answer (async) for: {query}")
+    response = await llm.ainvoke(messages)
+    log_token_usage(response)
+
+    logger.info("✅ Memory answer generated")
+    return _finalize_plain_answer(response.content)
+
+
+@timer
+async def generate_general_answer_async(query: str) -> dict:
+    """
+    Async variant of generate_general_answer() using `llm.ainvoke`.
+
+    Args:
+        query: The user's question or message.
+
+    Returns:
+        Same dict as generate_general_answer().
+    """
+    llm = get_llm()
+    messages = _build_general_messages(query)
+
+    logger.info(f"💬 Generating general answer (async) for: {query}")
+    response = await llm.ainvoke(messages)
+    log_token_usage(response)
+
+    logger.info("✅ General answer generated")
+    return _finalize_plain_answer(response.content)
+
+
+def _stream_answer(query: str, context_docs: list[Document], mode: str):
+    """
+    Stream an answer token-by-token for the given mode.
+
+    Yields text deltas as they arrive from the LLM, then a final result
+    dict (same shape as generate_answer) once the stream completes.
+    Citation extraction runs on the full text at the end.
+    """
+    if mode == "rag":
+        messages = _build_rag_messages(query, context_docs)
+
+        # Identical (query, context) — replay the cached answer in one delta
+        cached = get_cached(messages[0].content, query)
+        if cached is not None:
+            yield cached["answer"]
+            yield cached
+            return
+    elif mode == "memory":
+        messages = _build_memory_messages(query)
+    else:
+        messages = _build_general_messages(query)
+
+    llm = get_llm()
+    logger.info(f"📡 Streaming {mode} answer for: {query}")
+
+    # Timed here rather than with @timer, which would stop at the first yield
+    start_time = time.time()
+    first_token_at = None
+    full = None
+    for chunk in llm.stream(messages):
+        full = chunk if full is None else full + chunk
+        if chunk.content:
+            if first_token_at is None:
+                first_token_at = time.time() - start_time
+                logger.info(f"_stream_answer first token in {first_token_at:.2f}s")
+            yield chunk.content
+
+    answer_text = full.content if full is not None else ""
+    if full is not None:
+        log_token_usage(full)
+    logger.info(f"_stream_answer completed in {time.time() - start_time:.2f}s")
+
+    if mode == "rag":
+        result = _finalize_rag_answer(answer_text, context_docs)
+        set_cached(messages[0].content, query, result)
+        yield result
+    else:
+        yield _finalize_plain_answer(answer_text)
+
+
+async def generate_rag_answer_stream(query: str, context_docs: list[Document]):
+    """
+    Async-streaming variant of generate_rag_answer() using `llm.astream`.
+
+    Yields text deltas as they arrive, then a final sentinel dict once the
+    stream completes. Citation extraction and marker stripping are deferred
+    to that point, so the first token reaches the caller immediately.
+
+    Args:
+        query: The user's question.
+        context_docs: Retrieved documents providing context.
+
+    Yields:
+        str deltas, then a dict with keys:
+          - done: Always True; marks the end of the stream.
+          - answer: The cleaned answer text (citation markers stripped).
+          - citations: List of citation dicts.
+          - sources_used: List of unique source filenames.
+    """
+    messages = _build_rag_messages(query, context_docs)
+    system_prompt = messages[0].content
+
+    # Identical (query, context) — replay the cached answer in one delta
+    cached = get_cached(system_prompt, query)
+    if cached is not None:
+        yield cached["answer"]
+        yield {"done": True, **cached}
+        return
+
+    llm = get_llm()
+    logger.info(f"📡 Streaming RAG answer (async) for: {query}")
+
+    full = None
+    async for chunk in llm.astream(messages):
+        full = chunk if full is None else full + chunk
+        if chunk.content:
+            yield chunk.content
+
+    answer_text = full.content if full is not None else ""
+    if full is not None:
+        log_token_usage(full)
+
+    result = _finalize_rag_answer(answer_text, context_docs)
+    set_cached(system_prompt, query, result)
+    yield {"done": True, **result}
+
+
+def generate_answer(
+    query: str,
+    context_docs: list[Document],
+    mode: str = "rag",
+    stream: bool = False,
+):
     """
     Unified answer generator supporting multiple modes.
 
@@ -254,21 +559,60 @@ def generate_answer(query: str, context_docs: list[Document], mode: str = "rag")
         query: The user's question.
         context_docs: Retrieved documents (used only in "rag" mode).
         mode: Generation mode - "rag", "memory", or "general". Default: "rag".
+        stream: If True, return an iterator that yields text deltas and
+            finally the result dict, instead of the result dict itself.
 
     Returns:
         Dict with keys:
           - answer: The generated answer text.
           - citations: List of citations (only for rag mode).
           - sources_used: List of source filenames (only for rag mode).
+        When stream=True, an iterator of str deltas ending with that dict.
     """
     mode = mode.lower().strip()
 
+    if mode not in ("rag", "memory", "general"):
+        logger.warning(f"Unknown mode: {mode} — defaulting to 'general'")
+        mode = "general"
+
+    if stream:
+        return _stream_answer(query, context_docs, mode)
+
     if mode == "rag":
         return generate_rag_answer(query, context_docs)
     elif mode == "memory":
         return generate_memory_answer(query)
-    elif mode == "general":
+    else:
         return generate_general_answer(query)
+
+
+async def generate_answer_async(
+    query: str,
+    context_docs: list[Document],
+    mode: str = "rag",
+) -> dict:
+    """
+    Async counterpart of generate_answer() for event-loop callers.
+
+    Lets a server handle several user turns concurrently in one worker, or
+    gather several modes for one turn with asyncio.gather().
+
+    Args:
+        query: The user's question.
+        context_docs: Retrieved documents (used only in "rag" mode).
+        mode: Generation mode - "rag", "memory", or "general". Default: "rag".
+
+    Returns:
+        Same dict as generate_answer().
+    """
+    mode = mode.lower().strip()
+
+    if mode == "rag":
+        return await generate_rag_answer_async(query, context_docs)
+    elif mode == "memory":
+        return await generate_memory_answer_async(query)
+    elif mode == "general":
+        return await generate_general_answer_async(query)
     else:
         logger.warning(f"Unknown mode: {mode} — defaulting to 'general'")
-        return generate_general_answer(query)
+        return await generate_general_answer_async(query)
@@ -2,8 +2,19 @@
 
 from src.app.ingestion.parser import parse_pdf, parse_directory
 from src.app.ingestion.chunker import chunk_elements, process_chunks
-from src.app.ingestion.indexer import create_vector_store, load_vector_store, add_documents
-from src.app.ingestion.pipeline import run_ingestion_pipeline, run_ingestion_directory
+from src.app.ingestion.indexer import (
+    create_vector_store,
+    load_vector_store,
+    add_documents,
+    log_exact_count,
+)
+from src.app.ingestion.embedding_cache import CachedEmbeddings
+from src.app.ingestion.pipeline import (
+    run_ingestion_pipeline,
+    run_cached_ingestion_pipeline,
+    run_ingestion_directory,
+    get_index_cache_dir,
+)
 
 __all__ = [
     "parse_pdf",
@@ -13,6 +24,10 @@ __all__ = [
     "create_vector_store",
     "load_vector_store",
     "add_documents",
+    "log_exact_count",
+    "CachedEmbeddings",
     "run_ingestion_pipeline",
+    "run_cached_ingestion_pipeline",
     "run_ingestion_directory",
+    "get_index_cache_dir",
 ]
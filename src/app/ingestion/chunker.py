@@ -4,20 +4,28 @@ Text chunker with multimodal AI summarization.
 Chunks parsed PDF elements by title, classifies content types,
 and generates AI summaries for chunks containing tables or images.
 """
+import base64
 import json
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from langchain_core.documents import Document
 from langchain_core.messages import HumanMessage
-from unstructured.chunking.title import chunk_by_title
 
 from src.app.config import (
+    CHROMA_PERSIST_DIR,
     CHUNK_MAX_CHARACTERS,
     CHUNK_NEW_AFTER_N_CHARS,
     CHUNK_OVERLAP,
+    SUMMARY_MAX_CONCURRENCY,
+    SUMMARY_REQUESTS_PER_SECOND,
+    SUMMARY_BATCH_SIZE,
 )
+from src.app.ingestion.sidecar import originals_db_path, store_originals
 from src.app.logger import get_logger
-from src.app.utils import timer, get_llm
+from src.app.utils import timer, get_llm, strip_code_fence
 
 logger = get_logger(__name__)
 
@@ -34,36 +42,42 @@ def separate_content_types(chunk) -> dict:
         chunk: An unstructured CompositeElement containing sub-elements.
 
     Returns:
-        Dict with keys: 'text', 'tables_html', 'images', 'types'.
+        Dict with keys: 'text', 'tables_html', 'images' (raw image bytes),
+        and 'types'.
     """
+    from unstructured.documents.elements import Image, Table
+
     text_parts = []
     tables_html = []
-    images_base64 = []
+    images = []
     content_types = set()
 
-    for element in chunk.metadata.orig_elements:
-        el_type = type(element).__name__
+    # Pre-bound appends — this loop runs once per element in every chunk
+    add_type = content_types.add
+    append_text = text_parts.append
 
-        if el_type == "Table":
-            content_types.add("table")
+    for element in chunk.metadata.orig_elements:
+        if isinstance(element, Table):
+            add_type("table")
             html = getattr(element.metadata, "text_as_html", None)
             if html:
                 tables_html.append(html)
 
-        elif el_type == "Image":
-            content_types.add("image")
+        elif isinstance(element, Image):
+            add_type("image")
             payload = getattr(element.metadata, "image_base64", None)
             if payload:
-                images_base64.append(payload)
+                # Decode once; images stay raw JPEG bytes until prompt build
+                images.append(base64.b64decode(payload))
 
         else:
-            content_types.add("text")
-            text_parts.append(str(element))
+            add_type("text")
+            append_text(str(element))
 
     return {
         "text": "\n".join(text_parts),
         "tables_html": tables_html,
-        "images": images_base64,
+        "images": images,
         "types": sorted(content_types),
     }
 
@@ -82,23 +96,26 @@ TEXT:
 Respond ONLY with the summary paragraph — no preamble."""
 
 
-def create_ai_summary(text: str, tables_html: list, images_base64: list) -> str:
-    """
-    Generate an AI summary for a chunk that contains tables and/or images.
+_BATCH_SUMMARY_PROMPT = """You are a research document analyst. Below are several chunks of content from an academic paper. For EACH chunk, produce a single dense, keyword-rich paragraph that captures all important details. Your summaries will be used as the search index for retrieval-augmented generation, so maximize retrieval relevance.
 
-    Uses Gemini's multimodal capabilities to interpret visual content
-    alongside raw text.
+{chunks}
 
-    Args:
-        text: The raw text content of the chunk.
-        tables_html: List of HTML table strings.
-        images_base64: List of base64-encoded image strings.
+Images, if any, follow this text and are labeled with the chunk they belong to.
+
+Respond ONLY with a JSON array, one object per chunk, in this exact form:
+[{{"id": 1, "summary": "..."}}, {{"id": 2, "summary": "..."}}]"""
 
-    Returns:
-        A dense summary string optimized for retrieval.
-    """
-    llm = get_llm()
 
+def _image_part(image: bytes) -> dict:
+    """Build an image_url message part, base64-encoding only at this point."""
+    b64 = base64.b64encode(image).decode("ascii")
+    return {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{b64}"}}
+
+
+def _build_summary_message(
+    text: str, tables_html: list, images: list[bytes]
+) -> HumanMessage:
+    """Build the multimodal summary prompt for one chunk."""
     tables_section = ""
     if tables_html:
         tables_section = "TABLES:\n" + "\n".join(
@@ -113,17 +130,167 @@ def create_ai_summary(text: str, tables_html: list, images_base64: list) -> str:
     # Build multimodal message content
     message_content = [{"type": "text", "text": prompt_text}]
 
-    for img_b64 in images_base64:
-        message_content.append({
-            "type": "image_url",
-            "image_url": {"url": f"data:image/jpeg;base64,{img_b64}"},
-        })
+    for image in images:
+        message_content.append(_image_part(image))
+
+    return HumanMessage(content=message_content)
+
 
-    message = HumanMessage(content=message_content)
+def create_ai_summary(text: str, tables_html: list, images: list[bytes]) -> str:
+    """
+    Generate an AI summary for a chunk that contains tables and/or images.
+
+    Uses Gemini's multimodal capabilities to interpret visual content
+    alongside raw text.
+
+    Args:
+        text: The raw text content of the chunk.
+        tables_html: List of HTML table strings.
+        images: List of raw image bytes (JPEG).
+
+    Returns:
+        A dense summary string optimized for retrieval.
+    """
+    llm = get_llm()
+    message = _build_summary_message(text, tables_html, images)
     response = llm.invoke([message])
     return response.content
 
 
+def _build_batch_summary_message(batch: list[dict]) -> HumanMessage:
+    """Build one multimodal prompt covering several chunks, numbered from 1."""
+    sections = []
+    for n, content_data in enumerate(batch, 1):
+        section = f"CHUNK {n}:\nTEXT:\n{content_data['text'] or '(no text)'}"
+        if content_data["tables_html"]:
+            section += "\nTABLES:\n" + "\n".join(
+                f"Table {i+1}:\n{t}" for i, t in enumerate(content_data["tables_html"])
+            )
+        sections.append(section)
+
+    prompt_text = _BATCH_SUMMARY_PROMPT.format(chunks="\n\n".join(sections))
+    message_content = [{"type": "text", "text": prompt_text}]
+
+    for n, content_data in enumerate(batch, 1):
+        for image in content_data["images"]:
+            message_content.append({"type": "text", "text": f"Image for CHUNK {n}:"})
+            message_content.append(_image_part(image))
+
+    return HumanMessage(content=message_content)
+
+
+def _parse_batch_summaries(raw: str) -> dict[int, str]:
+    """Parse the JSON array returned for a batch into {id: summary}."""
+    summaries = {}
+    # Strip markdown code fences if the LLM wraps its JSON
+    for item in json.loads(strip_code_fence(raw)):
+        summary = str(item.get("summary", "")).strip()
+        if summary:
+            summaries[int(item["id"])] = summary
+    return summaries
+
+
+def create_ai_summaries_batch(batch: list[dict]) -> list[str | None]:
+    """
+    Summarize several multimodal chunks with a single LLM request.
+
+    Args:
+        batch: List of content dicts from separate_content_types().
+
+    Returns:
+        One summary per input chunk, in order; None where the response
+        did not include a usable summary for that chunk.
+    """
+    llm = get_llm()
+    message = _build_batch_summary_message(batch)
+    response = llm.invoke([message])
+    summaries = _parse_batch_summaries(response.content)
+    return [summaries.get(n) for n in range(1, len(batch) + 1)]
+
+
+class _RateLimiter:
+    """Space requests at least 1/rate seconds apart across threads."""
+
+    def __init__(self, rate: float):
+        self._interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self._interval
+        time.sleep(start - now)
+
+
+def _summarize_all(items: list[tuple[int, dict]], total: int) -> dict:
+    """
+    Summarize multimodal chunks in batches, running batches concurrently.
+
+    Chunks are grouped SUMMARY_BATCH_SIZE at a time into one request each.
+    Concurrency is capped by the thread pool size and request rate by a
+    shared limiter, so the two can be tuned independently. Chunks a batch
+    fails to cover are retried individually.
+
+    Uses the sync client on threads: the LLM client is shared process-wide,
+    and its async session must not be driven from a fresh event loop per call.
+
+    Args:
+        items: (chunk_id, content_data) pairs for chunks needing a summary.
+        total: Total number of chunks (for log messages).
+
+    Returns:
+        Dict mapping chunk_id -> summary text, or None if summarization failed.
+    """
+    limiter = _RateLimiter(SUMMARY_REQUESTS_PER_SECOND)
+
+    def _summarize_one(chunk_id: int, content_data: dict):
+        limiter.wait()
+        try:
+            return create_ai_summary(
+                content_data["text"],
+                content_data["tables_html"],
+                content_data["images"],
+            )
+        except Exception as e:
+            logger.error(f"  Chunk {chunk_id}/{total}: AI summary failed: {e}")
+            return None
+
+    def _summarize_batch(batch: list[tuple[int, dict]]) -> list:
+        chunk_ids = [chunk_id for chunk_id, _ in batch]
+        limiter.wait()
+        logger.info(f"  Chunks {chunk_ids}: summarizing multimodal content...")
+        try:
+            summaries = create_ai_summaries_batch(
+                [content_data for _, content_data in batch]
+            )
+        except Exception as e:
+            logger.error(f"  Chunks {chunk_ids}: batch AI summary failed: {e}")
+            summaries = [None] * len(batch)
+
+        # Retry anything the batch response didn't cover, one chunk at a time
+        for i, (chunk_id, content_data) in enumerate(batch):
+            if summaries[i] is None:
+                summaries[i] = _summarize_one(chunk_id, content_data)
+            if summaries[i]:
+                logger.info(f"✅ AI summary for chunk {chunk_id} ({len(summaries[i])} chars)")
+        return summaries
+
+    batches = [
+        items[i:i + SUMMARY_BATCH_SIZE]
+        for i in range(0, len(items), SUMMARY_BATCH_SIZE)
+    ]
+    with ThreadPoolExecutor(max_workers=SUMMARY_MAX_CONCURRENCY) as executor:
+        results = list(executor.map(_summarize_batch, batches))
+
+    return {
+        chunk_id: summary
+        for batch, summaries in zip(batches, results)
+        for (chunk_id, _), summary in zip(batch, summaries)
+    }
+
+
 # ---------------------------------------------------------------------------
 # Chunk processing pipeline
 # ---------------------------------------------------------------------------
@@ -138,6 +305,8 @@ def chunk_elements(elements: list) -> list:
     Returns:
         List of CompositeElement chunks.
     """
+    from unstructured.chunking.title import chunk_by_title
+
     logger.info("📐 Chunking elements by title...")
     chunks = chunk_by_title(
         elements,
@@ -150,7 +319,12 @@ def chunk_elements(elements: list) -> list:
 
 
 @timer
-def process_chunks(chunks: list, source_filename: str) -> list:
+def process_chunks(
+    chunks: list,
+    source_filename: str,
+    persist_dir: str = CHROMA_PERSIST_DIR,
+    doc_key: str | None = None,
+) -> list:
     """
     Process raw chunks into LangChain Documents with metadata.
 
@@ -161,6 +335,10 @@ def process_chunks(chunks: list, source_filename: str) -> list:
     Args:
         chunks: List of CompositeElement chunks from chunk_elements().
         source_filename: Name of the source PDF file.
+        persist_dir: Persist directory of the index the Documents go into;
+            original content is stored alongside it.
+        doc_key: Content key of the PDF (see sidecar.document_key()).
+            Defaults to the source filename.
 
     Returns:
         List of LangChain Document objects with rich metadata.
@@ -169,10 +347,10 @@ def process_chunks(chunks: list, source_filename: str) -> list:
     documents = []
     total = len(chunks)
 
-    for i, chunk in enumerate(chunks):
+    # Pass 1: classify every chunk (CPU-only) across a thread pool
+    def _classify(indexed_chunk):
+        i, chunk = indexed_chunk
         chunk_id = i + 1
-        logger.info(f"\tProcessing chunk {chunk_id}/{total}")
-
         content_data = separate_content_types(chunk)
         has_tables = len(content_data["tables_html"]) > 0
         has_images = len(content_data["images"]) > 0
@@ -182,44 +360,56 @@ def process_chunks(chunks: list, source_filename: str) -> list:
             f"Tables: {len(content_data['tables_html'])} | "
             f"Images: {len(content_data['images'])}"
         )
-
-        # AI-summarize multimodal chunks
-        # use raw text for text-only
-        if has_tables or has_images:
-            logger.info(f"  Chunk {chunk_id}/{total}: summarizing multimodal content...")
-            try:
-                page_content = create_ai_summary(
-                    content_data["text"],
-                    content_data["tables_html"],
-                    content_data["images"],
-                )
-                logger.info(f"✅ AI summary ({len(page_content)} chars)")
-            except Exception as e:
-                logger.error(f"  Chunk {chunk_id}/{total}: AI summary failed: {e}")
-                page_content = content_data["text"]
-            time.sleep(1)  # rate-limit guard
-        else:
-            logger.debug(f"  Chunk {chunk_id}/{total}: text-only, using raw content")
-            page_content = content_data["text"]
-
-        page_content = page_content or content_data["text"] or ""
-
-        doc = Document(
-            page_content=page_content,
-            metadata={
-                "source": source_filename,
-                "chunk_id": chunk_id,
-                "has_tables": has_tables,
-                "has_images": has_images,
-                "content_types": content_data["types"],
-                "original_content": json.dumps({
-                    "raw_text": content_data["text"],
-                    "tables_html": content_data["tables_html"],
-                    "images_base64": content_data["images"],
-                }),
-            },
-        )
-        documents.append(doc)
+        return chunk_id, content_data, has_tables, has_images
+
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        classified = list(executor.map(_classify, enumerate(chunks)))
+
+    # Pass 2: AI-summarize multimodal chunks in concurrent batches
+    # use raw text for text-only
+    multimodal = [
+        (chunk_id, content_data)
+        for chunk_id, content_data, has_tables, has_images in classified
+        if has_tables or has_images
+    ]
+    summaries = _summarize_all(multimodal, total) if multimodal else {}
+
+    # Pass 3: keep original content of multimodal chunks out of band —
+    # metadata holds a reference. Text-only chunks need no original copy:
+    # their page_content already is the raw text.
+    refs = {}
+    if multimodal:
+        stored = store_originals(doc_key or source_filename, [
+            (chunk_id, {
+                "raw_text": content_data["text"],
+                "tables_html": content_data["tables_html"],
+                "images": content_data["images"],
+            })
+            for chunk_id, content_data in multimodal
+        ], db_path=originals_db_path(persist_dir))
+        refs = {chunk_id: ref for (chunk_id, _), ref in zip(multimodal, stored)}
+
+    # Pass 4: assemble Documents in chunk order
+    for chunk_id, content_data, has_tables, has_images in classified:
+        page_content = summaries.get(chunk_id) or content_data["text"] or ""
+
+        metadata = {
+            "source": source_filename,
+            "chunk_id": chunk_id,
+            "has_tables": has_tables,
+            "has_images": has_images,
+            "content_types": content_data["types"],
+        }
+        if chunk_id in refs:
+            # The database path is resolved from the index at retrieval time
+            metadata["original_ref"] = refs[chunk_id]
+        if content_data["tables_html"]:
+            # Rendered once here so format_context never has to load originals
+            metadata["tables_rendered"] = "\n".join(
+                f"Table {j+1}: {t}" for j, t in enumerate(content_data["tables_html"])
+            )
+
+        documents.append(Document(page_content=page_content, metadata=metadata))
 
     logger.info(f"✅ Processed {len(documents)} chunks into Documents")
     return documents
@@ -0,0 +1,191 @@
+"""
+Two-tier embedding cache keyed by content hash.
+
+Wraps a LangChain embeddings model so each distinct text is embedded at
+most once: an in-process LRU serves repeats within a run, and a SQLite
+table of float32 vectors serves them across runs. Re-ingesting an
+unchanged PDF becomes a database lookup instead of an API round trip.
+
+Usage:
+    embeddings = CachedEmbeddings(GoogleGenerativeAIEmbeddings(model=...))
+    vectors = embeddings.embed_documents(texts)
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.app.config import (
+    EMBEDDING_MODEL,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_CACHE_MEMORY_SIZE,
+)
+from src.app.logger import get_logger
+
+logger = get_logger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    hash   BLOB PRIMARY KEY,
+    vector BLOB NOT NULL
+);
+"""
+
+# Stay well under SQLite's bound-parameter limit per IN (...) query
+_LOOKUP_CHUNK = 500
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper with an in-memory LRU in front of a SQLite store.
+
+    Cache keys hash the model namespace, the task type, and the text, so
+    switching embedding models or task types never returns stale vectors.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        db_path: str = EMBEDDING_CACHE_PATH,
+        namespace: str = EMBEDDING_MODEL,
+        memory_size: int = EMBEDDING_CACHE_MEMORY_SIZE,
+    ):
+        """
+        Args:
+            embeddings: The underlying embeddings model.
+            db_path: Path of the SQLite database.
+            namespace: Prefix mixed into every key (the model name).
+            memory_size: Maximum number of vectors held in memory.
+        """
+        self.embeddings = embeddings
+        self.db_path = db_path
+        self.namespace = namespace
+        self.memory_size = memory_size
+
+        self._memory: OrderedDict[bytes, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _key(self, text: str, task_type: str | None) -> bytes:
+        raw = f"{self.namespace}\x00{task_type or ''}\x00{text}"
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).digest()
+
+    def _connect(self) -> sqlite3.Connection:
+        parent = os.path.dirname(self.db_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def _remember(self, items) -> None:
+        with self._lock:
+            for key, vector in items:
+                self._memory[key] = vector
+                self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _lookup(self, keys: list[bytes]) -> dict[bytes, list[float]]:
+        """Return cached vectors for keys, checking memory then disk."""
+        found = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is None:
+                    missing.append(key)
+                else:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+
+        if missing and os.path.exists(self.db_path):
+            from_disk = {}
+            with closing(self._connect()) as conn:
+                for i in range(0, len(missing), _LOOKUP_CHUNK):
+                    chunk = missing[i:i + _LOOKUP_CHUNK]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = conn.execute(
+                        f"SELECT hash, vector FROM embeddings WHERE hash IN ({placeholders})",
+                        chunk,
+                    ).fetchall()
+                    for key, blob in rows:
+                        from_disk[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+            self._remember(from_disk.items())
+            found.update(from_disk)
+
+        return found
+
+    def _store(self, keys: list[bytes], vectors: list[list[float]]) -> list[list[float]]:
+        """Persist new vectors; return them as stored (float32-rounded)."""
+        arrays = [np.asarray(v, dtype=np.float32) for v in vectors]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?)",
+                [(key, arr.tobytes()) for key, arr in zip(keys, arrays)],
+            )
+        # Fresh and cached results are identical for the same text
+        stored = [arr.tolist() for arr in arrays]
+        self._remember(zip(keys, stored))
+        return stored
+
+    def _plan(self, texts: list[str], task_type: str | None):
+        """Split texts into cache hits and the unique misses to embed."""
+        keys = [self._key(text, task_type) for text in texts]
+        found = self._lookup(list(dict.fromkeys(keys)))
+        misses = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                misses.setdefault(key, text)
+        return keys, found, misses
+
+    def _finish(self, keys, found, misses, vectors) -> list[list[float]]:
+        if misses:
+            found.update(zip(misses, self._store(list(misses), vectors)))
+            logger.debug(
+                f"🧮 Embedded {len(misses)} new text(s), "
+                f"{len(keys) - len(misses)} served from cache"
+            )
+        return [found[key] for key in keys]
+
+    # ------------------------------------------------------------------
+    # Embeddings interface
+    # ------------------------------------------------------------------
+
+    def embed_documents(self, texts: list[str], **kwargs) -> list[list[float]]:
+        """Embed documents, requesting only texts missing from the cache."""
+        keys, found, misses = self._plan(texts, kwargs.get("task_type"))
+        vectors = self.embeddings.embed_documents(list(misses.values()), **kwargs) if misses else []
+        return self._finish(keys, found, misses, vectors)
+
+    async def aembed_documents(self, texts: list[str], **kwargs) -> list[list[float]]:
+        """Async variant of embed_documents()."""
+        keys, found, misses = self._plan(texts, kwargs.get("task_type"))
+        vectors = (
+            await self.embeddings.aembed_documents(list(misses.values()), **kwargs)
+            if misses else []
+        )
+        return self._finish(keys, found, misses, vectors)
+
+    def embed_query(self, text: str, **kwargs) -> list[float]:
+        """Embed a query, cached separately from document embeddings."""
+        task_type = f"query:{kwargs.get('task_type') or ''}"
+        keys, found, misses = self._plan([text], task_type)
+        vectors = [self.embeddings.embed_query(text, **kwargs)] if misses else []
+        return self._finish(keys, found, misses, vectors)[0]
+
+    async def aembed_query(self, text: str, **kwargs) -> list[float]:
+        """Async variant of embed_query()."""
+        task_type = f"query:{kwargs.get('task_type') or ''}"
+        keys, found, misses = self._plan([text], task_type)
+        vectors = [await self.embeddings.aembed_query(text, **kwargs)] if misses else []
+        return self._finish(keys, found, misses, vectors)[0]
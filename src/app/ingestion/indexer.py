@@ -4,21 +4,131 @@ Embedding generation and ChromaDB vector store management.
 Creates, loads, and manages the ChromaDB vector store for
 retrieval-augmented generation.
 """
-import os
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_chroma import Chroma
 
-from src.app.config import EMBEDDING_MODEL, CHROMA_PERSIST_DIR, CHROMA_COLLECTION_NAME
+from src.app.config import (
+    EMBEDDING_MODEL,
+    EMBED_BATCH_SIZE,
+    EMBED_MAX_CONCURRENCY,
+    CHROMA_PERSIST_DIR,
+    CHROMA_COLLECTION_NAME,
+    INDEX_BATCH_SIZE,
+    INDEX_MAX_WORKERS,
+    HNSW_M,
+    HNSW_CONSTRUCTION_EF,
+    HNSW_SEARCH_EF,
+    HNSW_NUM_THREADS,
+    UPSERT_BATCH_SIZE,
+)
+from src.app.ingestion.embedding_cache import CachedEmbeddings
+from src.app.retrieval.retriever import invalidate_cache
 from src.app.logger import get_logger
 from src.app.utils import timer
 
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
+
 logger = get_logger(__name__)
 
 
-def _get_embedding_model() -> GoogleGenerativeAIEmbeddings:
-    """Return the configured embedding model."""
-    return GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
+@lru_cache(maxsize=1)
+def _get_embedding_model() -> CachedEmbeddings:
+    """
+    Return the configured embedding model, behind the embedding cache.
+
+    Built once per process so every caller shares the client's HTTP
+    session and the cache's in-memory tier.
+    """
+    return CachedEmbeddings(GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL))
+
+
+def _embed_texts(
+    embedding_model: Embeddings,
+    texts: list[str],
+    batch_size: int = EMBED_BATCH_SIZE,
+    max_concurrency: int = EMBED_MAX_CONCURRENCY,
+) -> list[list[float]]:
+    """
+    Embed texts in bulk, sending `batch_size` texts per request.
+
+    Batches run on a thread pool through the synchronous client. The
+    shared embedding model's async client is bound to the event loop it
+    was first used on, so spinning up a fresh loop per call — possibly
+    from several threads at once — is not safe here.
+    """
+    if len(texts) <= batch_size:
+        return embedding_model.embed_documents(texts) if texts else []
+
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(batches))) as executor:
+        results = executor.map(embedding_model.embed_documents, batches)
+        return [embedding for batch in results for embedding in batch]
+
+
+def _stable_id(doc: Document) -> str:
+    """Deterministic id for a document, so re-adding it is idempotent."""
+    key = "\x00".join([
+        str(doc.metadata.get("source", "")),
+        str(doc.metadata.get("chunk_id", "")),
+        doc.page_content,
+    ])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def _write_batch(
+    vectorstore: "Chroma",
+    documents: list[Document],
+    embeddings: list[list[float]],
+) -> None:
+    """Write pre-embedded documents with a single collection.add."""
+    vectorstore._collection.add(
+        ids=[doc.id or _stable_id(doc) for doc in documents],
+        embeddings=embeddings,
+        documents=[doc.page_content for doc in documents],
+        metadatas=[doc.metadata for doc in documents],
+    )
+
+
+def _add_batch(vectorstore: "Chroma", documents: list[Document]) -> None:
+    """Pre-embed a batch of documents and write it with one collection.add."""
+    texts = [doc.page_content for doc in documents]
+    _write_batch(vectorstore, documents, _embed_texts(vectorstore.embeddings, texts))
+
+
+def _new_vector_store(
+    persist_dir: str = CHROMA_PERSIST_DIR,
+    collection_name: str = CHROMA_COLLECTION_NAME,
+    embeddings: Embeddings | None = None,
+) -> "Chroma":
+    """
+    Open (or create) a cosine-space Chroma collection for writing.
+
+    The HNSW parameters only take effect when the collection is created;
+    an existing collection keeps the settings it was built with.
+    """
+    from langchain_chroma import Chroma
+
+    return Chroma(
+        persist_directory=persist_dir,
+        embedding_function=embeddings or _get_embedding_model(),
+        collection_name=collection_name,
+        collection_metadata={
+            "hnsw:space": "cosine",
+            "hnsw:M": HNSW_M,
+            "hnsw:construction_ef": HNSW_CONSTRUCTION_EF,
+            "hnsw:search_ef": HNSW_SEARCH_EF,
+            "hnsw:num_threads": HNSW_NUM_THREADS,
+        },
+    )
 
 
 @timer
@@ -26,30 +136,40 @@ def create_vector_store(
     documents: list[Document],
     persist_dir: str = CHROMA_PERSIST_DIR,
     collection_name: str = CHROMA_COLLECTION_NAME,
-) -> Chroma:
+    batch_size: int = UPSERT_BATCH_SIZE,
+    embeddings: Embeddings | None = None,
+) -> "Chroma":
     """
     Create a ChromaDB vector store from documents and persist to disk.
 
+    Documents are embedded explicitly and written `batch_size` at a time
+    with collection.add, amortizing the SQLite transaction and HNSW
+    insert overhead across each batch.
+
     Args:
         documents: List of LangChain Document objects to index.
         persist_dir: Directory path for ChromaDB persistence.
         collection_name: Name of the ChromaDB collection.
+        batch_size: Number of documents per collection.add call.
+        embeddings: Embedding model to use instead of the configured one.
 
     Returns:
         Chroma vector store instance.
     """
     logger.info(f"🔮 Creating embeddings and storing in ChromaDB ({persist_dir})...")
 
-    embedding_model = _get_embedding_model()
-
-    vectorstore = Chroma.from_documents(
-        documents=documents,
-        embedding=embedding_model,
-        persist_directory=persist_dir,
+    vectorstore = _new_vector_store(
+        persist_dir=persist_dir,
         collection_name=collection_name,
-        collection_metadata={"hnsw:space": "cosine"},
+        embeddings=embeddings,
     )
 
+    for i in range(0, len(documents), batch_size):
+        _add_batch(vectorstore, documents[i:i + batch_size])
+
+    # A rebuilt collection must not keep serving pre-rebuild results
+    invalidate_cache()
+
     logger.info(f"✅ Vector store created with {len(documents)} documents")
     return vectorstore
 
@@ -57,7 +177,7 @@ def create_vector_store(
 def load_vector_store(
     persist_dir: str = CHROMA_PERSIST_DIR,
     collection_name: str = CHROMA_COLLECTION_NAME,
-) -> Chroma:
+) -> "Chroma":
     """
     Load an existing ChromaDB vector store from disk.
 
@@ -71,38 +191,91 @@ def load_vector_store(
     Raises:
         FileNotFoundError: If the persist directory doesn't exist.
     """
-    if not os.path.exists(persist_dir):
+    persist_path = Path(persist_dir)
+    try:
+        persist_path.stat()
+    except FileNotFoundError:
         raise FileNotFoundError(
             f"ChromaDB directory not found: {persist_dir}. "
             "Run the ingestion pipeline first."
-        )
+        ) from None
+
+    from langchain_chroma import Chroma
 
     logger.info(f"📂 Loading vector store from {persist_dir}...")
     embedding_model = _get_embedding_model()
 
     vectorstore = Chroma(
-        persist_directory=persist_dir,
+        persist_directory=str(persist_path),
         embedding_function=embedding_model,
         collection_name=collection_name,
     )
 
-    count = vectorstore._collection.count()
-    logger.info(f"✅ Loaded vector store with {count} documents")
+    # Counting rows is informational only — skip it unless debugging
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Loaded vector store with {vectorstore._collection.count()} documents")
+    logger.info("✅ Loaded vector store")
     return vectorstore
 
 
 def add_documents(
-    vectorstore: Chroma,
+    vectorstore: "Chroma",
     documents: list[Document],
+    batch_size: int = INDEX_BATCH_SIZE,
 ) -> None:
     """
     Add new documents to an existing vector store.
 
+    Embeddings are computed up front in bulk (EMBED_BATCH_SIZE texts per
+    request) under _embed_texts' single concurrency limit, and passed to
+    Chroma directly. Large inputs are then written in batches of
+    `batch_size` from a thread pool.
+
     Args:
         vectorstore: Existing Chroma vector store instance.
         documents: List of LangChain Document objects to add.
+        batch_size: Maximum number of documents per add call.
     """
     logger.info(f"➕ Adding {len(documents)} documents to vector store...")
-    vectorstore.add_documents(documents)
+
+    embeddings = _embed_texts(
+        vectorstore.embeddings, [doc.page_content for doc in documents]
+    )
+    batches = [
+        (documents[i:i + batch_size], embeddings[i:i + batch_size])
+        for i in range(0, len(documents), batch_size)
+    ]
+    if len(batches) <= 1:
+        _write_batch(vectorstore, documents, embeddings)
+    else:
+        with ThreadPoolExecutor(max_workers=INDEX_MAX_WORKERS) as executor:
+            list(executor.map(lambda batch: _write_batch(vectorstore, *batch), batches))
+
+    # Memoized searches may now be missing the new documents
+    invalidate_cache()
+
+    # Keep a running tally instead of a COUNT(*) per call; see log_exact_count()
+    added = len(documents)
+    vectorstore._approx_count = getattr(vectorstore, "_approx_count", 0) + added
+    logger.info(
+        f"✅ Added {added} documents "
+        f"(~{vectorstore._approx_count} added to this store so far)"
+    )
+
+
+def log_exact_count(vectorstore: "Chroma") -> int:
+    """
+    Log and return the exact number of documents in the vector store.
+
+    Counting scans the whole collection, so call this once at the end of
+    a pipeline rather than after every add.
+
+    Args:
+        vectorstore: Chroma vector store instance.
+
+    Returns:
+        Number of documents in the collection.
+    """
     count = vectorstore._collection.count()
-    logger.info(f"✅ Vector store now contains {count} documents")
+    logger.info(f"📊 Vector store contains {count} documents")
+    return count
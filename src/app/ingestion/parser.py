@@ -4,60 +4,122 @@ PDF parser using the `unstructured` library.
 Extracts structured elements (text, tables, images) from PDF files
 using the hi_res strategy for maximum fidelity.
 """
+import multiprocessing
 import os
-import glob
-from unstructured.partition.pdf import partition_pdf
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
+
+from src.app.config import CHUNK_MAX_CHARACTERS, CHUNK_NEW_AFTER_N_CHARS, CHUNK_OVERLAP
 from src.app.logger import get_logger
 from src.app.utils import timer
 
 logger = get_logger(__name__)
 
 
+def _parse_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    Process pool for parsing PDFs.
+
+    Uses the spawn start method: callers may already be running threads
+    (pipeline stages, gRPC clients), and forking a multi-threaded process
+    can deadlock the child.
+    """
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
 @timer
-def parse_pdf(file_path: str, extract_images: bool = True) -> list:
+def parse_pdf(file_path: str, extract_images: bool = True, chunk: bool = False) -> list:
     """
     Parse a single PDF file and extract structured elements.
 
     Args:
         file_path: Path to the PDF file.
         extract_images: Whether to extract images from the PDF.
+        chunk: If True, chunk by title during partitioning and return
+            CompositeElement chunks (same settings as chunk_elements()),
+            saving a separate pass over the element list.
 
     Returns:
-        List of unstructured Element objects.
+        List of unstructured Element objects, or chunks if `chunk` is True.
     """
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"PDF not found: {file_path}")
 
+    # Imported on first use: loads the layout/OCR model stack (torch, onnx)
+    from unstructured.partition.pdf import partition_pdf
+
     logger.info(f"📃 Partitioning document: {file_path}")
 
+    chunking_kwargs = {}
+    if chunk:
+        chunking_kwargs = {
+            "chunking_strategy": "by_title",
+            "max_characters": CHUNK_MAX_CHARACTERS,
+            "new_after_n_chars": CHUNK_NEW_AFTER_N_CHARS,
+            "overlap": CHUNK_OVERLAP,
+        }
+
     elements = partition_pdf(
         filename=file_path,
         strategy="hi_res",
         extract_images_in_pdf=extract_images,
         extract_image_block_to_payload=extract_images,
         infer_table_structure=True,
+        **chunking_kwargs,
     )
 
     logger.info(f"✅ Extracted {len(elements)} elements from {os.path.basename(file_path)}")
     return elements
 
 
-def parse_directory(dir_path: str, extract_images: bool = True) -> dict:
+def find_pdfs(dir_path: str) -> list[str]:
     """
-    Parse all PDF files in a directory.
+    List the PDF files in a directory, sorted by path.
 
     Args:
         dir_path: Path to the directory containing PDFs.
-        extract_images: Whether to extract images from PDFs.
 
     Returns:
-        Dictionary mapping filename -> list of elements.
+        Sorted list of PDF paths.
+
+    Raises:
+        NotADirectoryError: If dir_path is not a directory.
     """
     if not os.path.isdir(dir_path):
         raise NotADirectoryError(f"Directory not found: {dir_path}")
+    # One directory read; DirEntry.is_file uses the cached d_type, no stat
+    with os.scandir(dir_path) as entries:
+        return sorted(
+            entry.path
+            for entry in entries
+            if entry.is_file(follow_symlinks=False) and entry.name.lower().endswith(".pdf")
+        )
+
+
+def parse_directory(
+    dir_path: str,
+    extract_images: bool = True,
+    max_workers: int | None = None,
+) -> dict:
+    """
+    Parse all PDF files in a directory, one worker process per file.
+
+    hi_res partitioning runs layout models that hold the GIL, so files are
+    parsed in separate processes rather than threads.
+
+    Args:
+        dir_path: Path to the directory containing PDFs.
+        extract_images: Whether to extract images from PDFs.
+        max_workers: Number of worker processes. Defaults to
+            min(number of PDFs, CPU count).
 
-    pdf_files = glob.glob(os.path.join(dir_path, "*.pdf"))
+    Returns:
+        Dictionary mapping filename -> list of elements, in filename order.
+    """
+    pdf_files = find_pdfs(dir_path)
 
     if not pdf_files:
         logger.warning(f"No PDF files found in {dir_path}")
@@ -65,13 +127,23 @@ def parse_directory(dir_path: str, extract_images: bool = True) -> dict:
 
     logger.info(f"📂 Found {len(pdf_files)} PDF(s) in {dir_path}")
 
-    results = {}
-    for pdf_path in sorted(pdf_files):
-        filename = os.path.basename(pdf_path)
-        try:
-            elements = parse_pdf(pdf_path, extract_images=extract_images)
-            results[filename] = elements
-        except Exception as e:
-            logger.error(f"Failed to parse {filename}: {e}")
-
-    return results
+    if max_workers is None:
+        max_workers = min(len(pdf_files), os.cpu_count() or 1)
+
+    filenames = [os.path.basename(p) for p in pdf_files]
+
+    parsed = {}
+    with _parse_pool(max_workers) as executor:
+        futures = {
+            executor.submit(parse_pdf, pdf_path, extract_images): filename
+            for pdf_path, filename in zip(pdf_files, filenames)
+        }
+        for future in as_completed(futures):
+            filename = futures[future]
+            try:
+                parsed[filename] = future.result()
+            except Exception as e:
+                logger.error(f"Failed to parse {filename}: {e}")
+
+    # as_completed yields in finish order — restore filename order
+    return {name: parsed[name] for name in filenames if name in parsed}
@@ -3,17 +3,40 @@ Ingestion pipeline orchestrator.
 
 Chains together: parse → chunk → process (AI summarize) → index.
 """
+import hashlib
 import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING
 
-from langchain_chroma import Chroma
 
-from src.app.ingestion.parser import parse_pdf, parse_directory
+from src.app.ingestion.parser import parse_pdf, find_pdfs, _parse_pool
 from src.app.ingestion.chunker import chunk_elements, process_chunks
-from src.app.ingestion.indexer import create_vector_store, load_vector_store, add_documents
-from src.app.config import CHROMA_PERSIST_DIR
+from src.app.ingestion.sidecar import document_key
+from src.app.ingestion.indexer import (
+    create_vector_store,
+    load_vector_store,
+    _embed_texts,
+    _new_vector_store,
+    _write_batch,
+)
+from src.app.retrieval.retriever import invalidate_cache
+from src.app.config import (
+    CHROMA_PERSIST_DIR,
+    EMBEDDING_MODEL,
+    PDF_INDEX_CACHE_DIR,
+    CHUNK_DURING_PARTITION,
+    INGEST_QUEUE_MAXSIZE,
+    INGEST_DOC_BATCH_SIZE,
+    UPSERT_BATCH_SIZE,
+)
 from src.app.logger import get_logger
 from src.app.utils import timer
 
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
+
 logger = get_logger(__name__)
 
 
@@ -22,7 +45,7 @@ def run_ingestion_pipeline(
     pdf_path: str,
     persist_dir: str = CHROMA_PERSIST_DIR,
     extract_images: bool = True,
-) -> Chroma:
+) -> "Chroma":
     """
     Run the complete RAG ingestion pipeline on a single PDF.
 
@@ -41,14 +64,20 @@ def run_ingestion_pipeline(
     logger.info("🚀 Starting RAG Ingestion Pipeline")
     logger.info("=" * 50)
 
-    # Step 1: Parse
-    elements = parse_pdf(pdf_path, extract_images=extract_images)
-
-    # Step 2: Chunk
-    chunks = chunk_elements(elements)
+    # Steps 1–2: Parse and chunk — fused into one partition pass by default
+    if CHUNK_DURING_PARTITION:
+        chunks = parse_pdf(pdf_path, extract_images=extract_images, chunk=True)
+    else:
+        elements = parse_pdf(pdf_path, extract_images=extract_images)
+        chunks = chunk_elements(elements)
 
     # Step 3: Process (classify + AI summarize)
-    documents = process_chunks(chunks, source_filename)
+    documents = process_chunks(
+        chunks,
+        source_filename,
+        persist_dir=persist_dir,
+        doc_key=document_key(pdf_path),
+    )
 
     # Step 4: Index
     vectorstore = create_vector_store(documents, persist_dir=persist_dir)
@@ -58,15 +87,117 @@ def run_ingestion_pipeline(
     return vectorstore
 
 
+def get_index_cache_dir(
+    pdf_path: str,
+    cache_dir: str = PDF_INDEX_CACHE_DIR,
+    extract_images: bool = True,
+) -> str:
+    """
+    Return the persist directory used to cache the index for a PDF.
+
+    The directory name is a hash of the PDF path, its mtime, the embedding
+    model, and the image-extraction setting, so any change to the file or
+    the indexing setup maps to a fresh directory.
+
+    Args:
+        pdf_path: Path to the PDF file.
+        cache_dir: Root directory for cached indexes.
+        extract_images: Whether images are extracted during ingestion.
+
+    Returns:
+        Path of the cache directory for this PDF.
+    """
+    key = "\x00".join([
+        os.path.abspath(pdf_path),
+        str(os.path.getmtime(pdf_path)),
+        EMBEDDING_MODEL,
+        str(extract_images),
+    ])
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+    return os.path.join(cache_dir, digest)
+
+
+@timer
+def run_cached_ingestion_pipeline(
+    pdf_path: str,
+    cache_dir: str = PDF_INDEX_CACHE_DIR,
+    extract_images: bool = True,
+) -> "Chroma":
+    """
+    Run the ingestion pipeline, reusing a previously built index if valid.
+
+    Opens the cached vector store for this PDF when it exists and holds
+    documents; otherwise runs the full pipeline and keeps the result on
+    disk for the next run.
+
+    Args:
+        pdf_path: Path to the PDF file.
+        cache_dir: Root directory for cached indexes.
+        extract_images: Whether to extract images from the PDF.
+
+    Returns:
+        Chroma vector store instance with indexed documents.
+    """
+    if not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"PDF not found: {pdf_path}")
+
+    persist_dir = get_index_cache_dir(pdf_path, cache_dir, extract_images)
+
+    if os.path.isdir(persist_dir):
+        vectorstore = load_vector_store(persist_dir=persist_dir)
+        if vectorstore._collection.count() > 0:
+            logger.info(f"♻️ Reusing cached index for {os.path.basename(pdf_path)}")
+            return vectorstore
+        logger.warning(f"⚠️ Cached index at {persist_dir} is empty — rebuilding")
+
+    return run_ingestion_pipeline(
+        pdf_path,
+        persist_dir=persist_dir,
+        extract_images=extract_images,
+    )
+
+
+# End-of-stream marker passed between pipeline stages
+_DONE = object()
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> None:
+    """Put onto a bounded queue, giving up once the pipeline is stopping."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+def _get(q: queue.Queue, stop: threading.Event):
+    """Get from a queue, returning _DONE once the pipeline is stopping."""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
 @timer
 def run_ingestion_directory(
     dir_path: str,
     persist_dir: str = CHROMA_PERSIST_DIR,
     extract_images: bool = True,
-) -> Chroma:
+) -> "Chroma":
     """
     Run the ingestion pipeline on all PDFs in a directory.
 
+    Runs as four overlapping stages connected by bounded queues, so
+    parsing of one PDF overlaps with summarizing and embedding another:
+
+        parse (process pool) → chunk + summarize → embed → upsert
+
+    Only a few batches are in flight between stages at any time, which
+    bounds peak memory regardless of corpus size.
+
     Args:
         dir_path: Path to directory containing PDF files.
         persist_dir: Directory for ChromaDB persistence.
@@ -78,19 +209,102 @@ def run_ingestion_directory(
     logger.info("🚀 Starting Directory Ingestion Pipeline")
     logger.info("=" * 50)
 
-    parsed = parse_directory(dir_path, extract_images=extract_images)
+    pdf_files = find_pdfs(dir_path)
 
-    if not parsed:
+    if not pdf_files:
         raise ValueError(f"No PDFs found in {dir_path}")
 
-    all_documents = []
-    for filename, elements in parsed.items():
-        chunks = chunk_elements(elements)
-        documents = process_chunks(chunks, filename)
-        all_documents.extend(documents)
+    logger.info(f"📂 Found {len(pdf_files)} PDF(s) in {dir_path}")
+
+    vectorstore = _new_vector_store(persist_dir=persist_dir)
+    embedding_model = vectorstore.embeddings
+
+    parsed_q = queue.Queue(maxsize=INGEST_QUEUE_MAXSIZE)
+    docs_q = queue.Queue(maxsize=INGEST_QUEUE_MAXSIZE)
+    embedded_q = queue.Queue(maxsize=INGEST_QUEUE_MAXSIZE)
+    stop = threading.Event()
+
+    def _parse_stage():
+        # Stage 1: partition PDFs in worker processes, in completion order
+        try:
+            max_workers = min(len(pdf_files), os.cpu_count() or 1)
+            with _parse_pool(max_workers) as executor:
+                futures = {
+                    executor.submit(
+                        parse_pdf, pdf_path, extract_images, CHUNK_DURING_PARTITION
+                    ): pdf_path
+                    for pdf_path in pdf_files
+                }
+                for future in as_completed(futures):
+                    pdf_path = futures[future]
+                    try:
+                        _put(parsed_q, (pdf_path, future.result()), stop)
+                    except Exception as e:
+                        logger.error(f"Failed to parse {os.path.basename(pdf_path)}: {e}")
+        finally:
+            _put(parsed_q, _DONE, stop)
+
+    def _transform_stage():
+        # Stage 2: chunk + summarize, emitting Document micro-batches
+        try:
+            while (item := _get(parsed_q, stop)) is not _DONE:
+                pdf_path, parsed = item
+                chunks = parsed if CHUNK_DURING_PARTITION else chunk_elements(parsed)
+                documents = process_chunks(
+                    chunks,
+                    os.path.basename(pdf_path),
+                    persist_dir=persist_dir,
+                    doc_key=document_key(pdf_path),
+                )
+                for i in range(0, len(documents), INGEST_DOC_BATCH_SIZE):
+                    _put(docs_q, documents[i:i + INGEST_DOC_BATCH_SIZE], stop)
+        finally:
+            _put(docs_q, _DONE, stop)
+
+    def _embed_stage():
+        # Stage 3: embed each micro-batch in bulk
+        try:
+            while (batch := _get(docs_q, stop)) is not _DONE:
+                texts = [doc.page_content for doc in batch]
+                _put(embedded_q, (batch, _embed_texts(embedding_model, texts)), stop)
+        finally:
+            _put(embedded_q, _DONE, stop)
+
+    # Stage 4 (this thread): coalesce into UPSERT_BATCH_SIZE Chroma adds
+    total = 0
+    pending_docs, pending_embeddings = [], []
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        stages = [
+            executor.submit(_parse_stage),
+            executor.submit(_transform_stage),
+            executor.submit(_embed_stage),
+        ]
+        try:
+            while (item := _get(embedded_q, stop)) is not _DONE:
+                batch, embeddings = item
+                pending_docs.extend(batch)
+                pending_embeddings.extend(embeddings)
+                if len(pending_docs) >= UPSERT_BATCH_SIZE:
+                    _write_batch(vectorstore, pending_docs, pending_embeddings)
+                    total += len(pending_docs)
+                    pending_docs, pending_embeddings = [], []
+
+            if pending_docs:
+                _write_batch(vectorstore, pending_docs, pending_embeddings)
+                total += len(pending_docs)
+        finally:
+            # Release any stage still blocked on a queue (e.g. after a failure)
+            stop.set()
+            # Memoized searches may now be missing the new documents
+            invalidate_cache()
+
+        # Surface any stage failure
+        for stage in stages:
+            stage.result()
 
-    vectorstore = create_vector_store(all_documents, persist_dir=persist_dir)
+    if total == 0:
+        raise ValueError(f"No documents could be ingested from {dir_path}")
 
     logger.info("=" * 50)
-    logger.info(f"🎉 Indexed {len(all_documents)} documents from {len(parsed)} PDF(s)!")
+    logger.info(f"🎉 Indexed {total} documents from {len(pdf_files)} PDF(s)!")
     return vectorstore
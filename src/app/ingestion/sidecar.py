@@ -0,0 +1,156 @@
+"""
+Out-of-band store for original chunk content (raw text, tables, images).
+
+Keeps large payloads — especially images — out of ChromaDB metadata.
+Each index keeps its own SQLite database inside its persist directory, so
+deleting the index deletes its originals too. Rows are keyed by a hash of
+the PDF's bytes plus the chunk id, and chunks reference them from metadata
+by a short "doc_key:chunk_id" string.
+"""
+import hashlib
+import os
+import sqlite3
+from contextlib import closing
+
+import orjson
+
+from src.app.config import ORIGINALS_DB_NAME
+from src.app.logger import get_logger
+
+logger = get_logger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS originals (
+    doc_key     TEXT NOT NULL,
+    chunk_id    INTEGER NOT NULL,
+    raw_text    TEXT,
+    tables_json TEXT,
+    PRIMARY KEY (doc_key, chunk_id)
+);
+CREATE TABLE IF NOT EXISTS original_images (
+    doc_key  TEXT NOT NULL,
+    chunk_id INTEGER NOT NULL,
+    idx      INTEGER NOT NULL,
+    image    BLOB NOT NULL,
+    PRIMARY KEY (doc_key, chunk_id, idx)
+);
+"""
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    """Open a WAL-mode connection, creating the schema if needed."""
+    parent = os.path.dirname(db_path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def originals_db_path(persist_dir: str) -> str:
+    """Return the absolute path of the originals database for an index."""
+    return os.path.abspath(os.path.join(persist_dir, ORIGINALS_DB_NAME))
+
+
+def document_key(pdf_path: str) -> str:
+    """
+    Return a content-addressed key for a PDF.
+
+    Two different files with the same name, or one file before and after
+    an edit, get different keys, so their originals never overwrite each
+    other.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(pdf_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_ref(doc_key: str, chunk_id: int) -> str:
+    """Return the metadata reference string for a chunk."""
+    return f"{doc_key}:{chunk_id}"
+
+
+def store_originals(
+    doc_key: str,
+    payloads: list[tuple[int, dict]],
+    db_path: str,
+) -> list[str]:
+    """
+    Store original content for a document's chunks in one transaction.
+
+    Args:
+        doc_key: Key of the document the chunks belong to (see document_key()).
+        payloads: (chunk_id, payload) pairs, where payload has keys
+            'raw_text', 'tables_html', and 'images' (raw image bytes).
+        db_path: Path of the SQLite database.
+
+    Returns:
+        Reference strings for each chunk, in input order.
+    """
+    with closing(_connect(db_path)) as conn, conn:
+        for chunk_id, payload in payloads:
+            conn.execute(
+                "DELETE FROM original_images WHERE doc_key = ? AND chunk_id = ?",
+                (doc_key, chunk_id),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO originals VALUES (?, ?, ?, ?)",
+                (
+                    doc_key,
+                    chunk_id,
+                    payload.get("raw_text", ""),
+                    orjson.dumps(payload.get("tables_html", [])).decode(),
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO original_images VALUES (?, ?, ?, ?)",
+                [
+                    (doc_key, chunk_id, idx, img)
+                    for idx, img in enumerate(payload.get("images", []))
+                ],
+            )
+
+    logger.info(f"🗄️ Stored original content for {len(payloads)} chunk(s) of {doc_key}")
+    return [make_ref(doc_key, chunk_id) for chunk_id, _ in payloads]
+
+
+def load_original(ref: str, db_path: str) -> dict | None:
+    """
+    Load the original content for a chunk reference.
+
+    Args:
+        ref: Reference string from make_ref() ("doc_key:chunk_id").
+        db_path: Path of the SQLite database.
+
+    Returns:
+        Dict with 'raw_text', 'tables_html', and 'images' (bytes), or None
+        if the reference is unknown.
+    """
+    if not os.path.exists(db_path):
+        return None
+
+    doc_key, _, chunk_id = ref.rpartition(":")
+
+    with closing(_connect(db_path)) as conn:
+        row = conn.execute(
+            "SELECT raw_text, tables_json FROM originals "
+            "WHERE doc_key = ? AND chunk_id = ?",
+            (doc_key, int(chunk_id)),
+        ).fetchone()
+        if row is None:
+            return None
+
+        images = conn.execute(
+            "SELECT image FROM original_images "
+            "WHERE doc_key = ? AND chunk_id = ? ORDER BY idx",
+            (doc_key, int(chunk_id)),
+        ).fetchall()
+
+    return {
+        "raw_text": row[0] or "",
+        "tables_html": orjson.loads(row[1] or "[]"),
+        "images": [img for (img,) in images],
+    }
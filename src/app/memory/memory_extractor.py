@@ -5,13 +5,13 @@ from a conversation turn that are worth persisting.
 The LLM returns a structured JSON decision:
     {should_save, user_facts, company_facts, confidence}
 """
-import json
 from dataclasses import dataclass, field
 
+import orjson
 from langchain_core.messages import HumanMessage, SystemMessage
 
 from src.app.generation.prompts import MEMORY_EXTRACTION_PROMPT
-from src.app.utils import get_llm, log_token_usage
+from src.app.utils import get_llm, log_token_usage, strip_code_fence
 from src.app.logger import get_logger
 
 logger = get_logger(__name__)
@@ -61,15 +61,8 @@ def extract_memory(
         logger.info("🧠 Extracting memory from conversation turn...")
         response = llm.invoke(messages)
         log_token_usage(response)
-        raw = response.content.strip()
-
         # Strip markdown code fences if the LLM wraps its JSON
-        if raw.startswith("```"):
-            raw = raw.split("\n", 1)[-1]  # remove first line (```json)
-            raw = raw.rsplit("```", 1)[0]  # remove closing ```
-            raw = raw.strip()
-
-        data = json.loads(raw)
+        data = orjson.loads(strip_code_fence(response.content))
 
         decision = MemoryDecision(
             should_save=data.get("should_save", False),
@@ -86,7 +79,7 @@ def extract_memory(
         )
         return decision
 
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         logger.warning(f"⚠️ Failed to parse memory JSON: {e}")
         return MemoryDecision()
 
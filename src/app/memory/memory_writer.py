@@ -7,6 +7,7 @@ to avoid storing the same knowledge twice.
 import os
 from datetime import datetime
 
+from src.app.config import MEMORY_DEDUP_WINDOW_BYTES
 from src.app.logger import get_logger
 
 logger = get_logger(__name__)
@@ -28,20 +29,55 @@ def read_memory(file_path: str) -> str:
         return f.read()
 
 
-def _is_duplicate(fact: str, existing_content: str) -> bool:
+def read_memory_tail(file_path: str, max_bytes: int = MEMORY_DEDUP_WINDOW_BYTES) -> str:
     """
-    Check if a fact already exists in the memory file.
+    Read at most the last `max_bytes` of a memory file.
 
-    Uses case-insensitive substring matching to catch near-duplicates.
+    Starts at the first full line inside the window, so a partially read
+    line is never returned.
 
     Args:
-        fact: The fact to check.
-        existing_content: Current contents of the memory file.
+        file_path: Path to the memory file.
+        max_bytes: Size of the window at the end of the file.
 
     Returns:
-        True if the fact is already present.
+        The tail of the file as a string, or empty string if the file
+        doesn't exist.
     """
-    return fact.strip().lower() in existing_content.lower()
+    try:
+        with open(file_path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size <= max_bytes:
+                f.seek(0)
+            else:
+                f.seek(size - max_bytes)
+                f.readline()  # skip the partial first line
+            data = f.read()
+    except FileNotFoundError:
+        return ""
+    return data.decode("utf-8", errors="ignore")
+
+
+def _normalize_fact(fact: str) -> str:
+    """Normalize a fact for duplicate detection (trimmed, case-folded)."""
+    return fact.strip().lower()
+
+
+def _existing_facts(content: str) -> set[str]:
+    """
+    Collect the normalized bullet-point facts already in a memory file.
+
+    Args:
+        content: Current contents of the memory file.
+
+    Returns:
+        Set of normalized facts, one per "- " bullet line.
+    """
+    return {
+        _normalize_fact(stripped[2:])
+        for line in content.splitlines()
+        if (stripped := line.strip()).startswith("- ")
+    }
 
 
 def append_facts(
@@ -52,8 +88,8 @@ def append_facts(
     """
     Append high-signal facts to a memory markdown file.
 
-    - Reads existing content to deduplicate
-    - Skips facts that already appear in the file
+    - Reads bullet points from the tail of the file into a set to deduplicate
+    - Skips facts that already appear in the file (case-insensitive)
     - Writes new facts as markdown bullet points under a timestamped header
     - Creates the file if it doesn't exist
 
@@ -68,10 +104,16 @@ def append_facts(
     if not facts:
         return 0
 
-    existing = read_memory(file_path)
+    # Only recent facts can plausibly collide; keep dedup I/O bounded
+    seen = _existing_facts(read_memory_tail(file_path))
 
-    # Filter out duplicates
-    new_facts = [f for f in facts if f.strip() and not _is_duplicate(f, existing)]
+    # Filter out duplicates — of the file and within this batch
+    new_facts = []
+    for fact in facts:
+        key = _normalize_fact(fact)
+        if key and key not in seen:
+            seen.add(key)
+            new_facts.append(fact)
 
     if not new_facts:
         logger.info(f"📝 No new facts to write to {file_path}")
@@ -85,9 +127,15 @@ def append_facts(
     for fact in new_facts:
         lines.append(f"- {fact}")
     lines.append("")  # trailing newline
-
-    with open(file_path, "a", encoding="utf-8") as f:
-        f.write("\n".join(lines))
+    payload = "\n".join(lines).encode("utf-8")
+
+    # One O_APPEND write: small entries land atomically even with
+    # concurrent writers, and no text-layer buffer sits in between
+    fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, payload)
+    finally:
+        os.close(fd)
 
     logger.info(f"📝 Wrote {len(new_facts)} fact(s) to {file_path}")
     return len(new_facts)
@@ -1,9 +1,17 @@
 """Retrieval package — document retrieval with citation-aware formatting."""
 
-from src.app.retrieval.retriever import get_retriever, retrieve, format_context
+from src.app.retrieval.retriever import (
+    get_retriever,
+    retrieve,
+    retrieve_batch,
+    format_context,
+    invalidate_cache,
+)
 
 __all__ = [
     "get_retriever",
     "retrieve",
+    "retrieve_batch",
     "format_context",
+    "invalidate_cache",
 ]
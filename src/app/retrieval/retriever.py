@@ -4,17 +4,123 @@ Document retriever with context formatting for citation support.
 Wraps ChromaDB similarity search and formats retrieved documents
 with source attribution markers for grounded citations.
 """
-import json
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+import orjson
 from langchain_core.documents import Document
-from langchain_chroma import Chroma
 
 from src.app.config import TOP_K
 from src.app.logger import get_logger
 
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
+
 logger = get_logger(__name__)
 
 
-def get_retriever(vectorstore: Chroma, top_k: int = TOP_K):
+_SEARCH_CACHE_SIZE = 256
+_search_cache: OrderedDict[tuple, tuple[Document, ...]] = OrderedDict()
+_search_cache_lock = threading.Lock()
+
+
+def _store_key(vectorstore: "Chroma") -> tuple:
+    """
+    Identify a store by where it lives, not by the Python object.
+
+    The collection's UUID tells apart in-memory stores, which have no
+    persist directory, and a collection recreated under the same name.
+    """
+    collection = vectorstore._collection
+    return (
+        getattr(vectorstore, "_persist_directory", None),
+        collection.name,
+        str(collection.id),
+    )
+
+
+def _cache_get(key: tuple) -> list[Document] | None:
+    """Return copies of a memoized result, or None on a miss."""
+    with _search_cache_lock:
+        cached = _search_cache.get(key)
+        if cached is None:
+            return None
+        _search_cache.move_to_end(key)
+    return [doc.model_copy(deep=True) for doc in cached]
+
+
+def _cache_put(key: tuple, docs: list[Document]) -> None:
+    """Memoize copies of a search result, evicting the oldest entry."""
+    cached = tuple(doc.model_copy(deep=True) for doc in docs)
+    with _search_cache_lock:
+        _search_cache[key] = cached
+        if len(_search_cache) > _SEARCH_CACHE_SIZE:
+            _search_cache.popitem(last=False)
+
+
+def _attach_originals_db(vectorstore: "Chroma", docs: list[Document]) -> list[Document]:
+    """
+    Point sidecar refs at the originals database of the store they came from.
+
+    Only `original_ref` is stored in Chroma; the database path is resolved
+    here from the store's current location, so a moved or copied index
+    still finds its originals.
+    """
+    persist_dir = getattr(vectorstore, "_persist_directory", None)
+    if persist_dir:
+        from src.app.ingestion.sidecar import originals_db_path
+        db_path = originals_db_path(persist_dir)
+        for doc in docs:
+            if "original_ref" in doc.metadata:
+                doc.metadata["original_db"] = db_path
+    return docs
+
+
+def _similarity_search(vectorstore: "Chroma", query: str, k: int) -> list[Document]:
+    """
+    Run a similarity search, memoized per (store, query, k).
+
+    Keyed on the store's location and collection so the cache holds no
+    reference to the Chroma client. Callers get copies, so mutating a
+    returned Document cannot change later cache hits.
+    """
+    key = (*_store_key(vectorstore), query, k)
+    docs = _cache_get(key)
+    if docs is None:
+        docs = _attach_originals_db(vectorstore, vectorstore.similarity_search(query, k=k))
+        _cache_put(key, docs)
+    return docs
+
+
+def invalidate_cache() -> None:
+    """Drop memoized search results, e.g. after documents were added."""
+    with _search_cache_lock:
+        _search_cache.clear()
+
+
+class CachedRetriever:
+    """
+    Minimal retriever over a Chroma store with memoized searches.
+
+    Repeat queries (chat follow-ups, re-asked questions) skip both the
+    query embedding and the HNSW search. The cache is shared across
+    retriever instances for the same vector store, so creating a fresh
+    retriever per turn still hits it.
+    """
+
+    def __init__(self, vectorstore: "Chroma", top_k: int = TOP_K):
+        self.vectorstore = vectorstore
+        self.search_kwargs = {"k": top_k}
+
+    def invoke(self, query: str) -> list[Document]:
+        return _similarity_search(self.vectorstore, query, self.search_kwargs["k"])
+
+    def invalidate_cache(self) -> None:
+        invalidate_cache()
+
+
+def get_retriever(vectorstore: "Chroma", top_k: int = TOP_K) -> CachedRetriever:
     """
     Create a retriever from a Chroma vector store.
 
@@ -23,9 +129,9 @@ def get_retriever(vectorstore: Chroma, top_k: int = TOP_K):
         top_k: Number of documents to retrieve.
 
     Returns:
-        LangChain retriever instance.
+        CachedRetriever instance.
     """
-    return vectorstore.as_retriever(search_kwargs={"k": top_k})
+    return CachedRetriever(vectorstore, top_k=top_k)
 
 
 def retrieve(retriever, query: str) -> list[Document]:
@@ -33,7 +139,7 @@ def retrieve(retriever, query: str) -> list[Document]:
     Retrieve relevant documents for a query.
 
     Args:
-        retriever: LangChain retriever instance.
+        retriever: Retriever created by get_retriever().
         query: User query string.
 
     Returns:
@@ -45,6 +151,82 @@ def retrieve(retriever, query: str) -> list[Document]:
     return docs
 
 
+def retrieve_batch(retriever, queries: list[str]) -> list[list[Document]]:
+    """
+    Retrieve relevant documents for several queries in one round-trip.
+
+    Queries already in the search cache are served from it. The rest are
+    embedded with `embed_query`, like similarity_search does, and searched
+    with one Chroma query instead of one search per query; their results
+    are cached for later retrieve() calls.
+
+    Args:
+        retriever: Retriever created by get_retriever().
+        queries: List of query strings.
+
+    Returns:
+        One list of retrieved Document objects per query, in input order.
+    """
+    if not queries:
+        return []
+
+    vectorstore = retriever.vectorstore
+    top_k = retriever.search_kwargs.get("k", TOP_K)
+    store_key = _store_key(vectorstore)
+
+    logger.info(f"🔍 Batch-retrieving top documents for {len(queries)} queries...")
+
+    # Serve repeats from the same cache retrieve() uses
+    batched = [_cache_get((*store_key, query, top_k)) for query in queries]
+    misses = [i for i, docs in enumerate(batched) if docs is None]
+
+    if misses:
+        # Embed exactly as similarity_search does, so the batch measures the
+        # same retrieval the app runs; repeat queries hit the embedding cache
+        embeddings = vectorstore.embeddings
+        query_embeddings = [embeddings.embed_query(queries[i]) for i in misses]
+
+        results = vectorstore._collection.query(
+            query_embeddings=query_embeddings,
+            n_results=top_k,
+            include=["documents", "metadatas"],
+        )
+
+        for i, ids, texts, metadatas in zip(
+            misses, results["ids"], results["documents"], results["metadatas"]
+        ):
+            docs = _attach_originals_db(vectorstore, [
+                Document(id=doc_id, page_content=text or "", metadata=metadata or {})
+                for doc_id, text, metadata in zip(ids, texts, metadatas)
+            ])
+            _cache_put((*store_key, queries[i], top_k), docs)
+            batched[i] = docs
+
+    logger.info(f"✅ Retrieved {sum(len(d) for d in batched)} documents")
+    return batched
+
+
+def _load_original(metadata: dict) -> dict | None:
+    """
+    Return a chunk's original content from its metadata.
+
+    Reads from the index's sidecar store via `original_ref` and the
+    `original_db` path attached at retrieval time, falling back to the
+    inline `original_content` JSON written by older ingestions.
+    """
+    if "original_ref" in metadata and "original_db" in metadata:
+        from src.app.ingestion.sidecar import load_original
+        return load_original(metadata["original_ref"], db_path=metadata["original_db"])
+
+    if "original_content" in metadata:
+        try:
+            return orjson.loads(metadata["original_content"])
+        except orjson.JSONDecodeError:
+            return None
+
+    return None
+
+
 def format_context(docs: list[Document]) -> str:
     """
     Format retrieved documents into a context string with citation markers.
@@ -61,29 +243,30 @@ def format_context(docs: list[Document]) -> str:
     if not docs:
         return "No relevant documents found."
 
-    context_parts = []
+    # Fragments go into one flat list and are joined once at the end
+    parts = []
 
     for i, doc in enumerate(docs, 1):
-        source = doc.metadata.get("source", "unknown")
-        chunk_id = doc.metadata.get("chunk_id", "?")
-        has_tables = doc.metadata.get("has_tables", False)
-        has_images = doc.metadata.get("has_images", False)
-
-        header = f"[Source: {source}, Chunk {chunk_id}]"
-        content = doc.page_content
+        metadata = doc.metadata
+        if i > 1:
+            parts.append("\n\n")
+        parts.append(
+            f"--- Document {i} ---\n"
+            f"[Source: {metadata.get('source', 'unknown')}, "
+            f"Chunk {metadata.get('chunk_id', '?')}]\n"
+        )
+        parts.append(doc.page_content)
 
         # Include original tables if available for richer LLM context
-        if has_tables and "original_content" in doc.metadata:
-            try:
-                original = json.loads(doc.metadata["original_content"])
-                tables = original.get("tables_html", [])
-                if tables:
-                    content += "\n\nTABLES:\n" + "\n".join(
-                        f"Table {j+1}: {t}" for j, t in enumerate(tables)
-                    )
-            except (json.JSONDecodeError, KeyError):
-                pass
-
-        context_parts.append(f"--- Document {i} ---\n{header}\n{content}")
-
-    return "\n\n".join(context_parts)
+        if metadata.get("has_tables", False):
+            rendered = metadata.get("tables_rendered")
+            if rendered is None:
+                # Indexes built before tables_rendered existed
+                original = _load_original(metadata)
+                tables = original.get("tables_html", []) if original else []
+                rendered = "\n".join(f"Table {j+1}: {t}" for j, t in enumerate(tables))
+            if rendered:
+                parts.append("\n\nTABLES:\n")
+                parts.append(rendered)
+
+    return "".join(parts)
@@ -19,6 +19,9 @@ logger = get_logger(__name__)
 
 VALID_ROUTES = {"document_search", "memory_lookup", "general"}
 
+# One scan of the LLM response; the first route mentioned wins
+_ROUTE_RE = re.compile(r"\b(document_search|memory_lookup|general)\b")
+
 
 def route_query(query: str, has_vectorstore: bool) -> str:
     """
@@ -53,14 +56,15 @@ def route_query(query: str, has_vectorstore: bool) -> str:
         raw = response.content.strip().lower()
 
         # Extract the route from the response
-        for route in VALID_ROUTES:
-            if route in raw:
-                # Fallback: if no vectorstore and LLM says document_search
-                if route == "document_search" and not has_vectorstore:
-                    logger.info("🧭 No documents loaded — downgrading document_search -> general")
-                    return "general"
-                logger.info(f"🧭 Route: {route}")
-                return route
+        match = _ROUTE_RE.search(raw)
+        if match:
+            route = match.group(1)
+            # Fallback: if no vectorstore and LLM says document_search
+            if route == "document_search" and not has_vectorstore:
+                logger.info("🧭 No documents loaded — downgrading document_search -> general")
+                return "general"
+            logger.info(f"🧭 Route: {route}")
+            return route
 
         # Default fallback
         logger.warning(f"⚠️ Could not parse route from: {raw!r} — defaulting to general")
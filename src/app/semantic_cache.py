@@ -0,0 +1,173 @@
+"""
+Semantic query cache for the chat loop.
+
+Stores full answer payloads keyed by the query embedding and serves a
+cached result when a new query is near-identical (cosine similarity at
+or above a threshold) to one already answered. Short-circuits routing,
+retrieval, and generation for repeated questions.
+
+Usage:
+    cache = SemanticCache()
+    cached = cache.lookup(prompt)
+    if cached is None:
+        result = ...  # route + retrieve + generate
+        cache.put(prompt, result)
+"""
+import threading
+
+import numpy as np
+
+from src.app.config import SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX_SIZE
+from src.app.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class SemanticCache:
+    """
+    In-memory semantic cache with LRU eviction.
+
+    Embeddings are L2-normalized and kept in a dense matrix so a lookup is
+    a single inner-product scan; payloads live in a parallel list.
+    """
+
+    def __init__(
+        self,
+        embedding_model=None,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_cache_size: int = SEMANTIC_CACHE_MAX_SIZE,
+    ):
+        """
+        Args:
+            embedding_model: LangChain embeddings instance exposing
+                `embed_query`. Defaults to the model used for ChromaDB.
+            threshold: Minimum cosine similarity for a cache hit.
+            max_cache_size: Maximum number of cached entries before the
+                least recently used one is evicted.
+        """
+        self._embedding_model = embedding_model
+        self.threshold = threshold
+        self.max_cache_size = max_cache_size
+
+        self._vectors = None          # (n, dim) float32, L2-normalized
+        self._payloads: list[dict] = []
+        self._last_used: list[int] = []
+        self._tick = 0
+        self._last_query: tuple[str, np.ndarray] | None = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    def _embed(self, prompt: str) -> np.ndarray:
+        """Embed and L2-normalize a prompt, reusing the last embedding if possible."""
+        if self._last_query is not None and self._last_query[0] == prompt:
+            return self._last_query[1]
+
+        if self._embedding_model is None:
+            from src.app.ingestion.indexer import _get_embedding_model
+            self._embedding_model = _get_embedding_model()
+
+        vec = np.asarray(self._embedding_model.embed_query(prompt), dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        if norm > 0:
+            vec = vec / norm
+
+        self._last_query = (prompt, vec)
+        return vec
+
+    def lookup(self, prompt: str) -> dict | None:
+        """
+        Return the cached payload for a near-identical prompt, if any.
+
+        Args:
+            prompt: The user's query.
+
+        Returns:
+            The cached result dict, or None on a cache miss.
+        """
+        if not self._payloads:
+            return None
+
+        try:
+            vec = self._embed(prompt)
+        except Exception as e:
+            logger.warning(f"⚠️ Semantic cache lookup failed: {e}")
+            return None
+
+        with self._lock:
+            if not self._payloads:
+                return None
+            scores = self._vectors @ vec
+            best = int(np.argmax(scores))
+            score = float(scores[best])
+
+            if score < self.threshold:
+                logger.info(f"🗃️ Cache miss (best similarity {score:.3f})")
+                return None
+
+            self._tick += 1
+            self._last_used[best] = self._tick
+            logger.info(f"🗃️ Cache hit (similarity {score:.3f})")
+            return self._payloads[best]
+
+    def put(self, prompt: str, result: dict) -> None:
+        """
+        Store a result for a prompt, evicting the LRU entry when full.
+
+        Args:
+            prompt: The user's query.
+            result: The payload to cache (e.g. answer + citations).
+        """
+        try:
+            vec = self._embed(prompt)
+        except Exception as e:
+            logger.warning(f"⚠️ Semantic cache insert failed: {e}")
+            return
+
+        with self._lock:
+            self._tick += 1
+
+            if self._vectors is None:
+                self._vectors = vec[np.newaxis, :]
+                self._payloads.append(result)
+                self._last_used.append(self._tick)
+                return
+
+            if len(self._payloads) >= self.max_cache_size:
+                # Overwrite the least recently used slot in place
+                lru = int(np.argmin(self._last_used))
+                self._vectors[lru] = vec
+                self._payloads[lru] = result
+                self._last_used[lru] = self._tick
+                return
+
+            self._vectors = np.vstack([self._vectors, vec])
+            self._payloads.append(result)
+            self._last_used.append(self._tick)
+
+    def clear(self) -> None:
+        """Drop all cached entries (e.g. after new documents or memory)."""
+        with self._lock:
+            self._vectors = None
+            self._payloads = []
+            self._last_used = []
+            self._last_query = None
+
+
+_default_cache = SemanticCache()
+
+
+def lookup(prompt: str) -> dict | None:
+    """Look up a prompt in the process-wide default cache."""
+    return _default_cache.lookup(prompt)
+
+
+def put(prompt: str, result: dict) -> None:
+    """Store a result in the process-wide default cache."""
+    _default_cache.put(prompt, result)
+
+
+def clear() -> None:
+    """Clear the process-wide default cache."""
+    _default_cache.clear()
@@ -1,5 +1,7 @@
+import inspect
+import re
 import time
-from functools import wraps
+from functools import lru_cache, wraps
 
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_groq import ChatGroq
@@ -12,6 +14,10 @@ from src.app.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Markdown code fence with an optional language tag; the closing fence may
+# be followed by trailing prose, or be missing altogether
+_FENCE_RE = re.compile(r"^```[a-zA-Z]*\s*(.*?)\s*(?:```|$)", re.DOTALL)
+
 
 def log_token_usage(response):
     """
@@ -47,8 +53,33 @@ def log_token_usage(response):
     )
 
 
+def strip_code_fence(text: str) -> str:
+    """
+    Return the body of a markdown code fence the LLM wrapped its reply in.
+
+    Args:
+        text: Raw LLM response text.
+
+    Returns:
+        The fenced content, or the stripped text unchanged if it is not fenced.
+    """
+    text = text.strip()
+    match = _FENCE_RE.match(text)
+    return match.group(1) if match else text
+
+
 def timer(base_function):
-    """Decorator to measure and log function execution time."""
+    """Decorator to measure and log function execution time (sync or async)."""
+    if inspect.iscoroutinefunction(base_function):
+        @wraps(base_function)
+        async def enhanced_coroutine(*args, **kwargs):
+            start_time = time.time()
+            result = await base_function(*args, **kwargs)
+            elapsed = time.time() - start_time
+            logger.info(f"{base_function.__name__} completed in {elapsed:.2f}s")
+            return result
+        return enhanced_coroutine
+
     @wraps(base_function)
     def enhanced_function(*args, **kwargs):
         start_time = time.time()
@@ -59,20 +90,45 @@ def timer(base_function):
     return enhanced_function
 
 
-def get_llm():
+@lru_cache(maxsize=4)
+def get_llm(
+    provider: str = LLM_PROVIDER,
+    model: str | None = None,
+    temperature: float = LLM_TEMPERATURE,
+):
     """
-    Initialize and return the configured LLM.
+    Return the configured LLM, constructed once per process.
 
-    Uses LLM_PROVIDER config to select between Gemini and Groq.
+    Uses LLM_PROVIDER config to select between Gemini and Groq. The client
+    is memoized on (provider, model, temperature) so every caller shares
+    one instance and its underlying HTTP/gRPC connection.
+
+    Args:
+        provider: "groq" or "gemini". Defaults to LLM_PROVIDER.
+        model: Model name. Defaults to the provider's configured model.
+        temperature: Sampling temperature. Defaults to LLM_TEMPERATURE.
 
     Returns:
         LangChain chat model instance.
     """
-    if LLM_PROVIDER == "groq":
-        logger.info(f"Using Groq LLM: {GROQ_MODEL}")
-        return ChatGroq(model=GROQ_MODEL, temperature=LLM_TEMPERATURE)
+    if provider == "groq":
+        model = model or GROQ_MODEL
+        logger.info(f"Using Groq LLM: {model}")
+        return ChatGroq(model=model, temperature=temperature)
     else:
-        logger.info(f"Using Gemini LLM: {LLM_MODEL}")
-        return ChatGoogleGenerativeAI(
-            model=LLM_MODEL, temperature=LLM_TEMPERATURE
-        )
\ No newline at end of file
+        model = model or LLM_MODEL
+        logger.info(f"Using Gemini LLM: {model}")
+        return ChatGoogleGenerativeAI(model=model, temperature=temperature)
+
+
+def invalidate_clients() -> None:
+    """
+    Drop the memoized LLM and embedding clients.
+
+    The next get_llm() / embedding-model call builds a fresh instance —
+    useful in tests and after changing provider configuration.
+    """
+    from src.app.ingestion.indexer import _get_embedding_model
+
+    get_llm.cache_clear()
+    _get_embedding_model.cache_clear()
@@ -0,0 +1,33 @@
+"""Shared pytest fixtures."""
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessage
+
+
+@pytest.fixture(autouse=True)
+def _disable_llm_cache(monkeypatch):
+    """Keep mocked-LLM tests from reading or writing the on-disk answer cache."""
+    monkeypatch.setattr("src.app.generation.cache.LLM_CACHE_ENABLED", False)
+
+
+def _fake_llm(content: str = "", *, raises: Exception | None = None) -> SimpleNamespace:
+    """Build a minimal chat-model stand-in whose invoke() returns `content`."""
+    response = AIMessage(content=content)
+
+    def invoke(*_args, **_kwargs):
+        if raises is not None:
+            raise raises
+        return response
+
+    return SimpleNamespace(invoke=invoke)
+
+
+@pytest.fixture
+def fake_llm():
+    """
+    Factory for lightweight LLM stubs, cheaper than a MagicMock.
+
+    Use MagicMock instead when a test needs to assert on the calls made.
+    """
+    return _fake_llm
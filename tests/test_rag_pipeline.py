@@ -6,14 +6,77 @@ citation extraction, and the full ingestion + retrieval + generation flow.
 
 Run with:  python -m pytest tests/ -v
 """
+import asyncio
 import json
-import os
+import math
+import re
 import shutil
-import tempfile
+import threading
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock, MagicMock
+from diskcache import Cache
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from src.app.config import (
+    GOOGLE_API_KEY,
+    LLM_MODEL,
+    EMBEDDING_MODEL,
+    LLM_PROVIDER,
+    CHUNK_MAX_CHARACTERS,
+    CHUNK_NEW_AFTER_N_CHARS,
+    CHUNK_OVERLAP,
+    TOP_K,
+)
+from src.app.logger import get_logger
+from src.app.utils import get_llm, invalidate_clients
+from src.app.ingestion.chunker import (
+    separate_content_types,
+    _parse_batch_summaries,
+    _summarize_all,
+)
+from src.app.ingestion.parser import parse_pdf, parse_directory
+from src.app.ingestion.indexer import (
+    create_vector_store,
+    load_vector_store,
+    add_documents,
+    _embed_texts,
+)
+from src.app.ingestion.sidecar import (
+    document_key,
+    originals_db_path,
+    store_originals,
+    load_original,
+)
+from src.app.ingestion.embedding_cache import CachedEmbeddings
+from src.app.ingestion.pipeline import run_ingestion_directory
+from src.app.retrieval.retriever import (
+    format_context,
+    get_retriever,
+    retrieve,
+    retrieve_batch,
+    invalidate_cache,
+)
+from src.app.generation import cache as llm_cache
+from src.app.generation.generator import (
+    _CITATION_RE,
+    _extract_citations,
+    _rag_system_prompt,
+    _strip_html_comments,
+    generate_answer,
+    generate_answer_async,
+    generate_rag_answer_stream,
+)
+from src.app.memory.memory_extractor import extract_memory, MemoryDecision
+from src.app.memory.memory_writer import append_facts, read_memory, read_memory_tail
+from src.app.memory.memory_manager import process_memory
+from src.app.semantic_cache import SemanticCache
 
 
 # =====================================================================
@@ -24,31 +87,25 @@ class TestConfig:
     """Verify all required config values are present and valid."""
 
     def test_api_key_loaded(self):
-        from src.app.config import GOOGLE_API_KEY
         assert GOOGLE_API_KEY is not None, (
             "GOOGLE_API_KEY not set — create a .env file"
         )
 
     def test_llm_model_defined(self):
-        from src.app.config import LLM_MODEL
         assert LLM_MODEL and isinstance(LLM_MODEL, str)
 
     def test_embedding_model_defined(self):
-        from src.app.config import EMBEDDING_MODEL
         assert EMBEDDING_MODEL and isinstance(EMBEDDING_MODEL, str)
 
     def test_llm_provider_valid(self):
-        from src.app.config import LLM_PROVIDER
         assert LLM_PROVIDER in ("gemini", "groq")
 
     def test_chunk_params_positive(self):
-        from src.app.config import CHUNK_MAX_CHARACTERS, CHUNK_NEW_AFTER_N_CHARS, CHUNK_OVERLAP
         assert CHUNK_MAX_CHARACTERS > 0
         assert CHUNK_NEW_AFTER_N_CHARS > 0
         assert CHUNK_OVERLAP >= 0
 
     def test_top_k_positive(self):
-        from src.app.config import TOP_K
         assert TOP_K > 0
 
 
@@ -60,26 +117,40 @@ class TestLogger:
     """Verify the logger module works correctly."""
 
     def test_get_logger_returns_logger(self):
-        from src.app.logger import get_logger
         logger = get_logger("test_logger")
         assert logger is not None
         assert logger.name == "test_logger"
 
     def test_get_logger_no_duplicate_handlers(self):
-        from src.app.logger import get_logger
         logger1 = get_logger("dedup_test")
         handler_count = len(logger1.handlers)
         logger2 = get_logger("dedup_test")
         assert len(logger2.handlers) == handler_count
 
     def test_logger_outputs(self, capsys):
-        from src.app.logger import get_logger
         logger = get_logger("output_test")
         logger.info("hello test")
         captured = capsys.readouterr()
         assert "hello test" in captured.out
 
 
+class TestGetLLM:
+    """Verify the chat model client is built once and shared."""
+
+    @patch("src.app.utils.ChatGoogleGenerativeAI")
+    def test_get_llm_is_memoized(self, mock_chat):
+        get_llm.cache_clear()
+        try:
+            assert get_llm(provider="gemini") is get_llm(provider="gemini")
+            mock_chat.assert_called_once()
+
+            invalidate_clients()
+            get_llm(provider="gemini")
+            assert mock_chat.call_count == 2
+        finally:
+            get_llm.cache_clear()
+
+
 # =====================================================================
 # 3. Chunker — content type classification (unit, no API calls)
 # =====================================================================
@@ -88,64 +159,96 @@ class TestSeparateContentTypes:
     """Test the separate_content_types function with mock elements."""
 
     def _make_mock_chunk(self, elements):
-        """Create a mock chunk with orig_elements metadata."""
-        chunk = MagicMock()
-        chunk.metadata.orig_elements = elements
-        return chunk
+        """Create a stand-in chunk with orig_elements metadata."""
+        return SimpleNamespace(metadata=SimpleNamespace(orig_elements=elements))
 
     def _make_element(self, class_name, text="sample", text_as_html=None, image_base64=None):
-        el = MagicMock()
-        type(el).__name__ = class_name
-        el.__str__ = lambda self: text
-        el.metadata.text_as_html = text_as_html
-        el.metadata.image_base64 = image_base64
-        return el
-
-    def test_text_only_chunk(self):
-        from src.app.ingestion.chunker import separate_content_types
-        elements = [self._make_element("NarrativeText", text="Hello world")]
-        chunk = self._make_mock_chunk(elements)
-        result = separate_content_types(chunk)
-
-        assert "text" in result["types"]
-        assert result["tables_html"] == []
-        assert result["images"] == []
-        assert "Hello world" in result["text"]
-
-    def test_table_chunk(self):
-        from src.app.ingestion.chunker import separate_content_types
-        elements = [
-            self._make_element("Table", text_as_html="<table><tr><td>Content</td></tr></table>"),
-        ]
-        chunk = self._make_mock_chunk(elements)
-        result = separate_content_types(chunk)
+        """Build a real unstructured element, so isinstance checks see its true class."""
+        from unstructured.documents import elements
 
-        assert "table" in result["types"]
-        assert len(result["tables_html"]) == 1
-        assert "<table>" in result["tables_html"][0]
-
-    def test_image_chunk(self):
-        from src.app.ingestion.chunker import separate_content_types
+        metadata = elements.ElementMetadata(
+            text_as_html=text_as_html,
+            image_base64=image_base64,
+        )
+        return getattr(elements, class_name)(text=text, metadata=metadata)
+
+    @pytest.mark.parametrize("specs,expected_types,expected_tables,expected_images", [
+        ([("NarrativeText", "Hello world", None, None)], {"text"}, [], []),
+        (
+            [("Table", "sample", "<table><tr><td>Content</td></tr></table>", None)],
+            {"table"},
+            ["<table><tr><td>Content</td></tr></table>"],
+            [],
+        ),
+        ([("Image", "sample", None, "aW1n")], {"image"}, [], [b"img"]),
+        (
+            [
+                ("NarrativeText", "Some text", None, None),
+                ("Table", "sample", "<table></table>", None),
+                ("Image", "sample", None, "aW1n"),
+            ],
+            {"text", "table", "image"},
+            ["<table></table>"],
+            [b"img"],
+        ),
+    ], ids=["text", "table", "image", "mixed"])
+    def test_classifies_elements(self, specs, expected_types, expected_tables, expected_images):
         elements = [
-            self._make_element("Image", image_base64="base64data=="),
+            self._make_element(class_name, text=text, text_as_html=html, image_base64=image)
+            for class_name, text, html, image in specs
         ]
-        chunk = self._make_mock_chunk(elements)
-        result = separate_content_types(chunk)
-
-        assert "image" in result["types"]
-        assert len(result["images"]) == 1
-
-    def test_mixed_chunk(self):
-        from src.app.ingestion.chunker import separate_content_types
-        elements = [
-            self._make_element("NarrativeText", text="Some text"),
-            self._make_element("Table", text_as_html="<table></table>"),
-            self._make_element("Image", image_base64="img=="),
+        result = separate_content_types(self._make_mock_chunk(elements))
+
+        assert set(result["types"]) == expected_types
+        assert result["tables_html"] == expected_tables
+        assert result["images"] == expected_images
+        for class_name, text, _, _ in specs:
+            if class_name == "NarrativeText":
+                assert text in result["text"]
+
+
+class TestBatchSummaryParsing:
+    """Test parsing of batched multimodal summary responses."""
+
+    def test_parse_json_array(self):
+        raw = json.dumps([
+            {"id": 1, "summary": "Table of results."},
+            {"id": 2, "summary": "Architecture figure."},
+        ])
+        assert _parse_batch_summaries(raw) == {
+            1: "Table of results.",
+            2: "Architecture figure.",
+        }
+
+    def test_parse_fenced_json_skips_empty(self):
+        raw = '```json\n[{"id": 1, "summary": "Only one."}, {"id": 2, "summary": ""}]\n```'
+        assert _parse_batch_summaries(raw) == {1: "Only one."}
+
+    def test_parse_fenced_json_with_trailing_text(self):
+        raw = '```json\n[{"id": 1, "summary": "Only one."}]\n```\nLet me know if you need more.'
+        assert _parse_batch_summaries(raw) == {1: "Only one."}
+
+    def test_summarize_all_uses_sync_client_and_retries_gaps(self, monkeypatch):
+        monkeypatch.setattr("src.app.ingestion.chunker.SUMMARY_REQUESTS_PER_SECOND", 1000.0)
+        llm = MagicMock()
+        llm.invoke.side_effect = lambda messages: (
+            AIMessage(content='[{"id": 1, "summary": "Table of results."}]')
+            if "CHUNK 1:" in messages[0].content[0]["text"]
+            else AIMessage(content="Architecture figure.")
+        )
+        items = [
+            (1, {"text": "Results.", "tables_html": ["<table></table>"], "images": []}),
+            (2, {"text": "Figure.", "tables_html": [], "images": [b"img"]}),
         ]
-        chunk = self._make_mock_chunk(elements)
-        result = separate_content_types(chunk)
 
-        assert set(result["types"]) == {"image", "table", "text"}
+        with patch("src.app.ingestion.chunker.get_llm", return_value=llm):
+            # Twice in a row: no event loop is left bound to the shared client
+            first = _summarize_all(items, total=2)
+            second = _summarize_all(items, total=2)
+
+        assert first == second == {1: "Table of results.", 2: "Architecture figure."}
+        assert llm.invoke.call_count == 4
+        llm.ainvoke.assert_not_called()
 
 
 # =====================================================================
@@ -156,12 +259,10 @@ class TestFormatContext:
     """Test the format_context function."""
 
     def test_empty_docs(self):
-        from src.app.retrieval.retriever import format_context
         result = format_context([])
         assert "No relevant documents found" in result
 
     def test_single_doc_formatting(self):
-        from src.app.retrieval.retriever import format_context
         doc = Document(
             page_content="TinyLoRA reduces parameters.",
             metadata={"source": "TinyLoRA.pdf", "chunk_id": 3},
@@ -173,7 +274,6 @@ class TestFormatContext:
         assert "--- Document 1 ---" in result
 
     def test_multiple_docs(self):
-        from src.app.retrieval.retriever import format_context
         docs = [
             Document(page_content="First.", metadata={"source": "a.pdf", "chunk_id": 1}),
             Document(page_content="Second.", metadata={"source": "b.pdf", "chunk_id": 2}),
@@ -185,8 +285,27 @@ class TestFormatContext:
         assert "[Source: a.pdf, Chunk 1]" in result
         assert "[Source: b.pdf, Chunk 2]" in result
 
+    def test_exact_output_shape(self):
+        docs = [
+            Document(page_content="First.", metadata={"source": "a.pdf", "chunk_id": 1}),
+            Document(
+                page_content="Second.",
+                metadata={
+                    "source": "b.pdf",
+                    "chunk_id": 2,
+                    "has_tables": True,
+                    "tables_rendered": "Table 1: <table></table>",
+                },
+            ),
+        ]
+        assert format_context(docs) == (
+            "--- Document 1 ---\n[Source: a.pdf, Chunk 1]\nFirst."
+            "\n\n"
+            "--- Document 2 ---\n[Source: b.pdf, Chunk 2]\nSecond."
+            "\n\nTABLES:\nTable 1: <table></table>"
+        )
+
     def test_tables_included_when_present(self):
-        from src.app.retrieval.retriever import format_context
         doc = Document(
             page_content="Table content.",
             metadata={
@@ -204,6 +323,141 @@ class TestFormatContext:
         assert "TABLES:" in result
         assert "<table>" in result
 
+    @patch("src.app.ingestion.sidecar.load_original")
+    def test_prerendered_tables_skip_original_lookup(self, mock_load):
+        doc = Document(
+            page_content="Table content.",
+            metadata={
+                "source": "paper.pdf",
+                "chunk_id": 1,
+                "has_tables": True,
+                "original_ref": "paper.pdf:1",
+                "tables_rendered": "Table 1: <table><tr><td>fast</td></tr></table>",
+            },
+        )
+        result = format_context([doc])
+
+        assert "TABLES:\nTable 1: <table><tr><td>fast</td></tr></table>" in result
+        mock_load.assert_not_called()
+
+    @patch("src.app.ingestion.sidecar.load_original")
+    def test_tables_loaded_from_sidecar_ref(self, mock_load):
+        mock_load.return_value = {
+            "raw_text": "text",
+            "tables_html": ["<table><tr><td>sidecar</td></tr></table>"],
+            "images": [],
+        }
+        doc = Document(
+            page_content="Table content.",
+            metadata={
+                "source": "paper.pdf",
+                "chunk_id": 1,
+                "has_tables": True,
+                "original_ref": "abc123:1",
+                "original_db": "/idx/originals.sqlite",
+            },
+        )
+        result = format_context([doc])
+        mock_load.assert_called_once_with("abc123:1", db_path="/idx/originals.sqlite")
+        assert "sidecar" in result
+
+
+class TestRetrieveBatch:
+    """Test retrieve_batch with a mocked vector store."""
+
+    def test_batch_reshapes_results_per_query(self):
+        retriever = MagicMock()
+        retriever.search_kwargs = {"k": 2}
+        retriever.vectorstore.embeddings.embed_query.side_effect = lambda q: [float(q[1])]
+        retriever.vectorstore._collection.query.return_value = {
+            "ids": [["a1", "a2"], ["b1"]],
+            "documents": [["First.", "Second."], ["Third."]],
+            "metadatas": [
+                [{"source": "a.pdf", "chunk_id": 1}, {"source": "a.pdf", "chunk_id": 2}],
+                [{"source": "b.pdf", "chunk_id": 1}],
+            ],
+        }
+
+        batched = retrieve_batch(retriever, ["q1", "q2"])
+
+        assert [len(docs) for docs in batched] == [2, 1]
+        assert batched[0][1].page_content == "Second."
+        assert batched[1][0].metadata["source"] == "b.pdf"
+        query_kwargs = retriever.vectorstore._collection.query.call_args.kwargs
+        assert query_kwargs["n_results"] == 2
+        # Queries are embedded as queries, exactly as similarity_search does
+        assert query_kwargs["query_embeddings"] == [[1.0], [2.0]]
+        retriever.vectorstore.embeddings.embed_documents.assert_not_called()
+
+        # Results land in the shared search cache
+        assert retrieve_batch(retriever, ["q1", "q2"]) == batched
+        retriever.vectorstore._collection.query.assert_called_once()
+        assert retriever.vectorstore.embeddings.embed_query.call_count == 2
+
+    def test_empty_queries(self):
+        assert retrieve_batch(MagicMock(), []) == []
+
+
+class TestCachedRetriever:
+    """Test memoized similarity search across retriever instances."""
+
+    def test_repeat_query_searches_once(self):
+        vectorstore = MagicMock()
+        vectorstore.similarity_search.return_value = [
+            Document(page_content="Cached.", metadata={"source": "a.pdf", "chunk_id": 1}),
+        ]
+
+        first = retrieve(get_retriever(vectorstore, top_k=3), "What is TinyLoRA?")
+        second = retrieve(get_retriever(vectorstore, top_k=3), "What is TinyLoRA?")
+
+        assert first == second
+        vectorstore.similarity_search.assert_called_once_with("What is TinyLoRA?", k=3)
+
+        invalidate_cache()
+        retrieve(get_retriever(vectorstore, top_k=3), "What is TinyLoRA?")
+        assert vectorstore.similarity_search.call_count == 2
+
+    def test_in_memory_stores_do_not_share_entries(self):
+        stores = []
+        for text in ("From store A.", "From store B."):
+            vectorstore = MagicMock()
+            vectorstore._persist_directory = None
+            vectorstore._collection.name = "rag_documents"
+            vectorstore.similarity_search.return_value = [Document(page_content=text)]
+            stores.append(vectorstore)
+
+        results = [retrieve(get_retriever(vs), "What is TinyLoRA?") for vs in stores]
+
+        assert [r[0].page_content for r in results] == ["From store A.", "From store B."]
+
+    def test_sidecar_db_resolved_from_store_location(self):
+        vectorstore = MagicMock()
+        vectorstore._persist_directory = "/moved/index"
+        vectorstore.similarity_search.return_value = [
+            Document(page_content="Table.", metadata={"original_ref": "abc123:1"}),
+            Document(page_content="Text."),
+        ]
+
+        docs = retrieve(get_retriever(vectorstore), "What is TinyLoRA?")
+
+        assert docs[0].metadata["original_db"] == originals_db_path("/moved/index")
+        assert "original_db" not in docs[1].metadata
+
+    def test_cached_results_are_copies(self):
+        vectorstore = MagicMock()
+        vectorstore.similarity_search.return_value = [
+            Document(page_content="Original.", metadata={"source": "a.pdf", "chunk_id": 1}),
+        ]
+
+        first = retrieve(get_retriever(vectorstore), "What is TinyLoRA?")
+        first[0].page_content = "Mutated."
+        first[0].metadata["source"] = "b.pdf"
+        second = retrieve(get_retriever(vectorstore), "What is TinyLoRA?")
+
+        assert second[0].page_content == "Original."
+        assert second[0].metadata["source"] == "a.pdf"
+        vectorstore.similarity_search.assert_called_once()
+
 
 # =====================================================================
 # 5. Generator — citation extraction (unit, no API calls)
@@ -213,7 +467,6 @@ class TestCitationExtraction:
     """Test the _extract_citations function."""
 
     def test_single_citation(self):
-        from src.app.generation.generator import _extract_citations
         answer = "TinyLoRA reduces params [Source: TinyLoRA.pdf, Chunk 3]."
         docs = [
             Document(
@@ -229,7 +482,6 @@ class TestCitationExtraction:
         assert citations[0]["snippet"] != ""
 
     def test_multiple_citations(self):
-        from src.app.generation.generator import _extract_citations
         answer = (
             "Claim A [Source: a.pdf, Chunk 1]. "
             "Claim B [Source: b.pdf, Chunk 5]."
@@ -241,8 +493,11 @@ class TestCitationExtraction:
         citations = _extract_citations(answer, docs)
         assert len(citations) == 2
 
+    def test_citation_regex_is_precompiled(self):
+        assert isinstance(_CITATION_RE, re.Pattern)
+        assert _CITATION_RE.findall("x [Source: a.pdf, Chunk 12]") == [("a.pdf", "12")]
+
     def test_duplicate_citations_deduped(self):
-        from src.app.generation.generator import _extract_citations
         answer = (
             "Fact [Source: a.pdf, Chunk 1]. "
             "Same fact [Source: a.pdf, Chunk 1]."
@@ -254,11 +509,28 @@ class TestCitationExtraction:
         assert len(citations) == 1
 
     def test_no_citations(self):
-        from src.app.generation.generator import _extract_citations
         answer = "I don't have enough information to answer that."
         citations = _extract_citations(answer, [])
         assert len(citations) == 0
 
+    @patch("src.app.generation.generator.format_context")
+    def test_rag_system_prompt_cached_by_docs(self, mock_format):
+        mock_format.return_value = "CONTEXT"
+        docs = [
+            Document(page_content="Prompt cache doc.", metadata={"source": "p.pdf", "chunk_id": 9}),
+        ]
+
+        first = _rag_system_prompt(docs)
+        second = _rag_system_prompt(list(docs))
+
+        assert first == second
+        assert "CONTEXT" in first
+        mock_format.assert_called_once()
+
+    def test_strip_html_comments(self):
+        text = "# Memory\n<!-- header\nnote -->\n- fact <!-- inline -->kept\n<!-- open"
+        assert _strip_html_comments(text) == "# Memory\n\n- fact kept\n<!-- open"
+
 
 # =====================================================================
 # 6. Parser — file validation (unit, no heavy PDF parsing)
@@ -268,85 +540,291 @@ class TestParser:
     """Test parser edge cases."""
 
     def test_missing_file_raises_error(self):
-        from src.app.ingestion.parser import parse_pdf
         with pytest.raises(FileNotFoundError):
             parse_pdf("/nonexistent/path/to/file.pdf")
 
     def test_missing_directory_raises_error(self):
-        from src.app.ingestion.parser import parse_directory
         with pytest.raises(NotADirectoryError):
             parse_directory("/nonexistent/directory")
 
-    def test_empty_directory_returns_empty(self):
-        from src.app.ingestion.parser import parse_directory
-        with tempfile.TemporaryDirectory() as tmpdir:
-            result = parse_directory(tmpdir)
-            assert result == {}
+    def test_empty_directory_returns_empty(self, tmp_path):
+        result = parse_directory(tmp_path)
+        assert result == {}
 
 
 # =====================================================================
 # 7. Indexer — vector store lifecycle (unit with temp directory)
 # =====================================================================
 
+class _HashEmbeddings(Embeddings):
+    """Deterministic character-trigram hashing embeddings — no model load."""
+
+    dim = 64
+
+    def _embed(self, text):
+        vector = [0.0] * self.dim
+        for word in text.lower().split():
+            for i in range(max(len(word) - 2, 1)):
+                vector[zlib.crc32(word[i:i + 3].encode()) % self.dim] += 1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+@pytest.fixture(scope="module")
+def shared_vs(tmp_path_factory):
+    """
+    Build one Chroma store, over hashing embeddings, for the indexer tests to share.
+
+    Tests using it are in the "indexer" xdist group, so under
+    `--dist loadgroup` they run on one worker and the store is built once.
+    """
+    docs = [
+        Document(
+            page_content="Test document about machine learning.",
+            metadata={"source": "test.pdf", "chunk_id": 1},
+        ),
+        Document(
+            page_content="Another document about neural networks.",
+            metadata={"source": "test.pdf", "chunk_id": 2},
+        ),
+        Document(
+            page_content="TinyLoRA reduces the number of trainable parameters.",
+            metadata={"source": "tiny.pdf", "chunk_id": 1},
+        ),
+        Document(
+            page_content="Transformers use self-attention mechanisms.",
+            metadata={"source": "transformer.pdf", "chunk_id": 1},
+        ),
+    ]
+    persist_dir = str(tmp_path_factory.mktemp("shared_vs") / "chroma_db")
+    vs = create_vector_store(docs, persist_dir=persist_dir, embeddings=_HashEmbeddings())
+    return vs, persist_dir
+
+
 class TestIndexer:
     """Test indexer create/load operations."""
 
     def test_load_nonexistent_raises_error(self):
-        from src.app.ingestion.indexer import load_vector_store
         with pytest.raises(FileNotFoundError):
             load_vector_store(persist_dir="/nonexistent/chroma_db")
 
-    @pytest.mark.integration
-    def test_create_and_load_vector_store(self):
-        """Integration test: create a vector store and reload it."""
-        from src.app.ingestion.indexer import create_vector_store, load_vector_store
-
+    def test_add_documents_batches_large_inputs(self):
+        vectorstore = MagicMock()
+        vectorstore._approx_count = 10
+        vectorstore.embeddings.embed_documents.side_effect = (
+            lambda texts: [[float(len(t))] for t in texts]
+        )
         docs = [
-            Document(
-                page_content="Test document about machine learning.",
-                metadata={"source": "test.pdf", "chunk_id": 1},
-            ),
-            Document(
-                page_content="Another document about neural networks.",
-                metadata={"source": "test.pdf", "chunk_id": 2},
-            ),
+            Document(page_content=f"Doc {i}", metadata={"source": "a.pdf", "chunk_id": i})
+            for i in range(5)
+        ]
+        add_documents(vectorstore, docs, batch_size=2)
+
+        # The running tally replaces a full-collection count per call
+        assert vectorstore._approx_count == 15
+        vectorstore._collection.count.assert_not_called()
+
+        calls = [c.kwargs for c in vectorstore._collection.add.call_args_list]
+        assert sorted(len(c["ids"]) for c in calls) == [1, 2, 2]
+        assert sorted(m["chunk_id"] for c in calls for m in c["metadatas"]) == list(range(5))
+        # Embeddings are passed in pre-computed, aligned with the documents
+        assert all(len(c["embeddings"]) == len(c["documents"]) for c in calls)
+        # Texts are embedded once up front, not per write batch
+        vectorstore.embeddings.embed_documents.assert_called_once()
+
+    @patch("src.app.ingestion.indexer._new_vector_store")
+    def test_create_vector_store_batched_with_stable_ids(self, mock_new):
+        vectorstore = MagicMock()
+        vectorstore.embeddings.embed_documents.side_effect = (
+            lambda texts: [[0.0] for _ in texts]
+        )
+        mock_new.return_value = vectorstore
+        docs = [
+            Document(page_content=f"Doc {i}", metadata={"source": "a.pdf", "chunk_id": i})
+            for i in range(3)
         ]
 
-        with tempfile.TemporaryDirectory() as tmpdir:
-            persist_dir = os.path.join(tmpdir, "chroma_db")
+        create_vector_store(docs, persist_dir="unused", batch_size=2)
+        create_vector_store(docs, persist_dir="unused", batch_size=2)
 
-            # Create
-            vs = create_vector_store(docs, persist_dir=persist_dir)
-            assert vs is not None
+        calls = [c.kwargs for c in vectorstore._collection.add.call_args_list]
+        assert [len(c["ids"]) for c in calls] == [2, 1, 2, 1]
+        # Same documents map to the same ids on every run
+        assert calls[0]["ids"] == calls[2]["ids"]
 
-            # Load
-            vs_loaded = load_vector_store(persist_dir=persist_dir)
-            count = vs_loaded._collection.count()
-            assert count == 2
+    def test_embed_texts_repeatable_and_thread_safe(self):
+        embedding_model = MagicMock()
+        embedding_model.embed_documents.side_effect = (
+            lambda batch: [[float(t.split()[1])] for t in batch]
+        )
+        texts = [f"Doc {i}" for i in range(7)]
+        expected = [[float(i)] for i in range(7)]
 
-    @pytest.mark.integration
-    def test_similarity_search_returns_results(self):
-        """Integration test: verify similarity search works."""
-        from src.app.ingestion.indexer import create_vector_store
+        # Back-to-back calls on the same model
+        assert _embed_texts(embedding_model, texts, batch_size=3) == expected
+        assert _embed_texts(embedding_model, texts, batch_size=3) == expected
 
-        docs = [
-            Document(
-                page_content="TinyLoRA reduces the number of trainable parameters.",
-                metadata={"source": "tiny.pdf", "chunk_id": 1},
-            ),
-            Document(
-                page_content="Transformers use self-attention mechanisms.",
-                metadata={"source": "transformer.pdf", "chunk_id": 1},
-            ),
-        ]
+        # Concurrent calls from two threads
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(
+                lambda _: _embed_texts(embedding_model, texts, batch_size=3), range(2)
+            ))
+        assert results == [expected, expected]
+        embedding_model.aembed_documents.assert_not_called()
 
-        with tempfile.TemporaryDirectory() as tmpdir:
-            persist_dir = os.path.join(tmpdir, "chroma_db")
-            vs = create_vector_store(docs, persist_dir=persist_dir)
+    @pytest.mark.integration
+    @pytest.mark.xdist_group("indexer")
+    def test_create_and_load_vector_store(self, shared_vs):
+        """Integration test: reload the shared vector store from disk."""
+        _, persist_dir = shared_vs
 
-            results = vs.similarity_search("parameter reduction", k=1)
-            assert len(results) == 1
-            assert "TinyLoRA" in results[0].page_content
+        vs_loaded = load_vector_store(persist_dir=persist_dir)
+        count = vs_loaded._collection.count()
+        assert count == 4
+
+    @pytest.mark.xdist_group("indexer")
+    def test_similarity_search_returns_results(self, shared_vs):
+        """Integration test: verify similarity search works."""
+        vs, _ = shared_vs
+
+        # Ranked against all four shared documents — no source filter
+        results = vs.similarity_search("parameter reduction", k=2)
+        assert len(results) == 2
+        assert "TinyLoRA" in results[0].page_content
+        assert "TinyLoRA" not in results[1].page_content
+
+
+class TestIngestionDirectory:
+    """Test the staged directory pipeline with parsing, summarizing and embedding stubbed."""
+
+    @pytest.fixture
+    def pdf_dir(self, tmp_path):
+        for name in ("a.pdf", "b.pdf"):
+            (tmp_path / name).write_bytes(f"%PDF {name}".encode())
+        return tmp_path
+
+    @pytest.fixture
+    def stages(self, monkeypatch):
+        """Stub every stage's heavy work; return the list of written batches."""
+        written = []
+        monkeypatch.setattr("src.app.ingestion.pipeline.CHUNK_DURING_PARTITION", True)
+        monkeypatch.setattr("src.app.ingestion.pipeline.INGEST_DOC_BATCH_SIZE", 2)
+        monkeypatch.setattr("src.app.ingestion.pipeline.UPSERT_BATCH_SIZE", 3)
+        # Threads stand in for worker processes so the stubs apply
+        monkeypatch.setattr(
+            "src.app.ingestion.pipeline._parse_pool",
+            lambda max_workers: ThreadPoolExecutor(max_workers=max_workers),
+        )
+        monkeypatch.setattr(
+            "src.app.ingestion.pipeline.parse_pdf",
+            lambda path, extract_images, chunk: [f"chunk {i}" for i in range(5)],
+        )
+        monkeypatch.setattr(
+            "src.app.ingestion.pipeline.process_chunks",
+            lambda chunks, source, **kwargs: [
+                Document(page_content=c, metadata={"source": source, "chunk_id": i})
+                for i, c in enumerate(chunks)
+            ],
+        )
+        monkeypatch.setattr(
+            "src.app.ingestion.pipeline._embed_texts",
+            lambda model, texts: [[0.0] for _ in texts],
+        )
+        monkeypatch.setattr("src.app.ingestion.pipeline._new_vector_store", lambda **kwargs: MagicMock())
+        monkeypatch.setattr(
+            "src.app.ingestion.pipeline._write_batch",
+            lambda vs, docs, embeddings: written.append(list(docs)),
+        )
+        return written
+
+    def _run(self, pdf_dir, tmp_path):
+        """Run the pipeline in a thread so a deadlock fails instead of hanging."""
+        outcome = {}
+
+        def target():
+            try:
+                outcome["result"] = run_ingestion_directory(
+                    str(pdf_dir), persist_dir=str(tmp_path / "db")
+                )
+            except Exception as e:
+                outcome["error"] = e
+
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        thread.join(timeout=30)
+        assert not thread.is_alive(), "pipeline did not finish"
+        return outcome
+
+    def test_every_document_reaches_the_store_in_order(self, pdf_dir, tmp_path, stages):
+        outcome = self._run(pdf_dir, tmp_path)
+
+        assert "error" not in outcome
+        written = [doc for batch in stages for doc in batch]
+        assert len(written) == 10
+        for source in ("a.pdf", "b.pdf"):
+            chunk_ids = [d.metadata["chunk_id"] for d in written if d.metadata["source"] == source]
+            assert chunk_ids == list(range(5))
+
+    def test_stage_failure_is_raised_without_hanging(self, pdf_dir, tmp_path, stages, monkeypatch):
+        def _fail(chunks, source, **kwargs):
+            raise RuntimeError("summarizer down")
+
+        monkeypatch.setattr("src.app.ingestion.pipeline.process_chunks", _fail)
+
+        outcome = self._run(pdf_dir, tmp_path)
+
+        assert isinstance(outcome.get("error"), RuntimeError)
+        assert stages == []
+
+
+class TestSidecar:
+    """Test the out-of-band original content store."""
+
+    def test_store_and_load_roundtrip(self, tmp_path):
+        db_path = tmp_path / "originals.sqlite"
+        refs = store_originals("paper.pdf", [
+            (1, {"raw_text": "Intro", "tables_html": [], "images": []}),
+            (2, {
+                "raw_text": "Results",
+                "tables_html": ["<table></table>"],
+                "images": [b"img"],
+            }),
+        ], db_path=db_path)
+
+        assert refs == ["paper.pdf:1", "paper.pdf:2"]
+        original = load_original("paper.pdf:2", db_path=db_path)
+        assert original["raw_text"] == "Results"
+        assert original["tables_html"] == ["<table></table>"]
+        assert original["images"] == [b"img"]
+
+    def test_load_unknown_ref(self, tmp_path):
+        db_path = tmp_path / "originals.sqlite"
+        assert load_original("paper.pdf:1", db_path=db_path) is None
+        store_originals("paper.pdf", [], db_path=db_path)
+        assert load_original("paper.pdf:1", db_path=db_path) is None
+
+    def test_same_filename_different_content_kept_apart(self, tmp_path):
+        first, second = tmp_path / "a" / "paper.pdf", tmp_path / "b" / "paper.pdf"
+        for path, body in ((first, b"%PDF one"), (second, b"%PDF two")):
+            path.parent.mkdir()
+            path.write_bytes(body)
+        key_one, key_two = document_key(first), document_key(second)
+        assert key_one != key_two
+
+        db_path = originals_db_path(tmp_path / "index")
+        assert db_path.startswith(str(tmp_path / "index"))
+        payload = {"tables_html": [], "images": []}
+        [ref_one] = store_originals(key_one, [(1, {**payload, "raw_text": "one"})], db_path=db_path)
+        [ref_two] = store_originals(key_two, [(1, {**payload, "raw_text": "two"})], db_path=db_path)
+
+        assert load_original(ref_one, db_path=db_path)["raw_text"] == "one"
+        assert load_original(ref_two, db_path=db_path)["raw_text"] == "two"
 
 
 # =====================================================================
@@ -357,15 +835,11 @@ class TestGenerateAnswer:
     """Test generate_answer with a mocked LLM to avoid API calls."""
 
     @patch("src.app.generation.generator.get_llm")
-    def test_generate_answer_structure(self, mock_get_llm):
-        from src.app.generation.generator import generate_answer
-
+    def test_generate_answer_structure(self, mock_get_llm, fake_llm):
         # Mock LLM response
-        mock_llm = MagicMock()
-        mock_llm.invoke.return_value = MagicMock(
-            content="TinyLoRA reduces parameters to as few as 1 [Source: tiny.pdf, Chunk 1]."
+        mock_get_llm.return_value = fake_llm(
+            "TinyLoRA reduces parameters to as few as 1 [Source: tiny.pdf, Chunk 1]."
         )
-        mock_get_llm.return_value = mock_llm
 
         docs = [
             Document(
@@ -384,42 +858,142 @@ class TestGenerateAnswer:
         assert result["citations"][0]["source"] == "tiny.pdf"
 
     @patch("src.app.generation.generator.get_llm")
-    def test_generate_answer_no_info(self, mock_get_llm):
-        from src.app.generation.generator import generate_answer
-
-        mock_llm = MagicMock()
-        mock_llm.invoke.return_value = MagicMock(
-            content="I don't have enough information in the uploaded documents to answer that question."
+    def test_generate_answer_no_info(self, mock_get_llm, fake_llm):
+        mock_get_llm.return_value = fake_llm(
+            "I don't have enough information in the uploaded documents to answer that question."
         )
-        mock_get_llm.return_value = mock_llm
 
         result = generate_answer("What is quantum computing?", [])
 
         assert result["citations"] == []
         assert result["sources_used"] == []
 
+    @patch("src.app.generation.generator.get_llm")
+    def test_rag_answer_cached_on_repeat(self, mock_get_llm, monkeypatch, tmp_path):
+        monkeypatch.setattr(llm_cache, "LLM_CACHE_ENABLED", True)
+        monkeypatch.setattr(llm_cache, "_cache", Cache(str(tmp_path)))
+
+        mock_llm = MagicMock()
+        mock_llm.invoke.return_value = AIMessage(
+            content="TinyLoRA reduces parameters [Source: tiny.pdf, Chunk 1]."
+        )
+        mock_get_llm.return_value = mock_llm
+
+        docs = [
+            Document(
+                page_content="TinyLoRA is a technique for reducing trainable params.",
+                metadata={"source": "tiny.pdf", "chunk_id": 1},
+            ),
+        ]
+
+        first = generate_answer("What is TinyLoRA?", docs)
+        second = generate_answer("What is TinyLoRA?", docs)
+
+        assert mock_llm.invoke.call_count == 1
+        assert second == first
+
+    @patch("src.app.generation.generator.get_llm")
+    def test_generate_answer_async(self, mock_get_llm):
+        mock_llm = MagicMock()
+        mock_llm.ainvoke = AsyncMock(return_value=AIMessage(
+            content="TinyLoRA reduces parameters [Source: tiny.pdf, Chunk 1]."
+        ))
+        mock_get_llm.return_value = mock_llm
+
+        docs = [
+            Document(
+                page_content="TinyLoRA is a technique for reducing trainable params.",
+                metadata={"source": "tiny.pdf", "chunk_id": 1},
+            ),
+        ]
+
+        result = asyncio.run(generate_answer_async("What is TinyLoRA?", docs))
+
+        mock_llm.ainvoke.assert_awaited_once()
+        assert result["answer"] == "TinyLoRA reduces parameters."
+        assert result["citations"][0]["source"] == "tiny.pdf"
+
+    @patch("src.app.generation.generator.get_llm")
+    def test_generate_answer_stream(self, mock_get_llm):
+        mock_llm = MagicMock()
+        mock_llm.stream.return_value = iter([
+            AIMessageChunk(content="TinyLoRA reduces "),
+            AIMessageChunk(content="parameters [Source: tiny.pdf, Chunk 1]."),
+        ])
+        mock_get_llm.return_value = mock_llm
+
+        docs = [
+            Document(
+                page_content="TinyLoRA is a technique for reducing trainable params.",
+                metadata={"source": "tiny.pdf", "chunk_id": 1},
+            ),
+        ]
+
+        events = list(generate_answer("What is TinyLoRA?", docs, stream=True))
+        deltas, result = events[:-1], events[-1]
+
+        assert all(isinstance(d, str) for d in deltas)
+        assert "".join(deltas).startswith("TinyLoRA reduces parameters")
+        assert result["answer"] == "TinyLoRA reduces parameters."
+        assert len(result["citations"]) == 1
+        assert result["citations"][0]["chunk_id"] == 1
+
+    @patch("src.app.generation.generator.get_llm")
+    def test_generate_rag_answer_stream_async(self, mock_get_llm):
+        async def _astream(messages):
+            for text in ("TinyLoRA reduces ", "parameters [Source: tiny.pdf, Chunk 1]."):
+                yield AIMessageChunk(content=text)
+
+        mock_llm = MagicMock()
+        mock_llm.astream = _astream
+        mock_get_llm.return_value = mock_llm
+
+        docs = [
+            Document(
+                page_content="TinyLoRA is a technique for reducing trainable params.",
+                metadata={"source": "tiny.pdf", "chunk_id": 1},
+            ),
+        ]
+
+        async def _collect():
+            return [e async for e in generate_rag_answer_stream("What is TinyLoRA?", docs)]
+
+        events = asyncio.run(_collect())
+        deltas, final = events[:-1], events[-1]
+
+        assert deltas == ["TinyLoRA reduces ", "parameters [Source: tiny.pdf, Chunk 1]."]
+        assert final["done"] is True
+        assert final["answer"] == "TinyLoRA reduces parameters."
+        assert final["sources_used"] == ["tiny.pdf"]
+
 
 # =====================================================================
 # 9. Memory Extractor — LLM-based fact extraction (unit, mocked LLM)
 # =====================================================================
 
+# Canned extractor replies, serialized once at import
+_HIGH_SIGNAL_JSON = (
+    '{"should_save": true, '
+    '"user_facts": ["User prefers weekly summaries on Mondays"], '
+    '"company_facts": ["Asset Management interfaces with Project Finance"], '
+    '"confidence": 0.9}'
+)
+_NO_SIGNAL_JSON = (
+    '{"should_save": false, "user_facts": [], "company_facts": [], "confidence": 0.0}'
+)
+_FENCED_JSON = (
+    '```json\n'
+    '{"should_save": true, "user_facts": ["Role: analyst"], "company_facts": [], "confidence": 0.8}'
+    '\n```'
+)
+
+
 class TestMemoryExtractor:
     """Test memory extraction with a mocked LLM to avoid API calls."""
 
     @patch("src.app.memory.memory_extractor.get_llm")
-    def test_extract_high_signal_facts(self, mock_get_llm):
-        from src.app.memory.memory_extractor import extract_memory
-
-        mock_llm = MagicMock()
-        mock_llm.invoke.return_value = MagicMock(
-            content=json.dumps({
-                "should_save": True,
-                "user_facts": ["User prefers weekly summaries on Mondays"],
-                "company_facts": ["Asset Management interfaces with Project Finance"],
-                "confidence": 0.9,
-            })
-        )
-        mock_get_llm.return_value = mock_llm
+    def test_extract_high_signal_facts(self, mock_get_llm, fake_llm):
+        mock_get_llm.return_value = fake_llm(_HIGH_SIGNAL_JSON)
 
         decision = extract_memory(
             "I prefer weekly summaries on Mondays.",
@@ -432,19 +1006,8 @@ class TestMemoryExtractor:
         assert decision.confidence == 0.9
 
     @patch("src.app.memory.memory_extractor.get_llm")
-    def test_extract_no_signal(self, mock_get_llm):
-        from src.app.memory.memory_extractor import extract_memory
-
-        mock_llm = MagicMock()
-        mock_llm.invoke.return_value = MagicMock(
-            content=json.dumps({
-                "should_save": False,
-                "user_facts": [],
-                "company_facts": [],
-                "confidence": 0.0,
-            })
-        )
-        mock_get_llm.return_value = mock_llm
+    def test_extract_no_signal(self, mock_get_llm, fake_llm):
+        mock_get_llm.return_value = fake_llm(_NO_SIGNAL_JSON)
 
         decision = extract_memory("Hello!", "Hi there!")
 
@@ -454,14 +1017,10 @@ class TestMemoryExtractor:
         assert decision.confidence == 0.0
 
     @patch("src.app.memory.memory_extractor.get_llm")
-    def test_malformed_json_graceful(self, mock_get_llm):
-        from src.app.memory.memory_extractor import extract_memory
-
-        mock_llm = MagicMock()
-        mock_llm.invoke.return_value = MagicMock(
-            content="This is not valid JSON at all!"
+    def test_malformed_json_graceful(self, mock_get_llm, fake_llm):
+        mock_get_llm.return_value = fake_llm(
+            "This is not valid JSON at all!"
         )
-        mock_get_llm.return_value = mock_llm
 
         decision = extract_memory("test", "test")
 
@@ -471,15 +1030,9 @@ class TestMemoryExtractor:
         assert decision.confidence == 0.0
 
     @patch("src.app.memory.memory_extractor.get_llm")
-    def test_markdown_fenced_json(self, mock_get_llm):
+    def test_markdown_fenced_json(self, mock_get_llm, fake_llm):
         """Test that JSON wrapped in markdown code fences is handled."""
-        from src.app.memory.memory_extractor import extract_memory
-
-        mock_llm = MagicMock()
-        mock_llm.invoke.return_value = MagicMock(
-            content='```json\n{"should_save": true, "user_facts": ["Role: analyst"], "company_facts": [], "confidence": 0.8}\n```'
-        )
-        mock_get_llm.return_value = mock_llm
+        mock_get_llm.return_value = fake_llm(_FENCED_JSON)
 
         decision = extract_memory("I'm an analyst.", "Got it!")
 
@@ -487,61 +1040,92 @@ class TestMemoryExtractor:
         assert len(decision.user_facts) == 1
         assert decision.confidence == 0.8
 
+    @patch("src.app.memory.memory_extractor.get_llm")
+    def test_fenced_json_with_trailing_text(self, mock_get_llm, fake_llm):
+        """Test that prose after the closing fence does not drop the facts."""
+        mock_get_llm.return_value = fake_llm(_FENCED_JSON + " Hope this helps!")
+
+        decision = extract_memory("I'm an analyst.", "Got it!")
+
+        assert decision.should_save is True
+        assert decision.user_facts == ["Role: analyst"]
+
+    @patch("src.app.memory.memory_extractor.get_llm")
+    def test_inline_fenced_json(self, mock_get_llm, fake_llm):
+        """Test a single-line fence with no language tag."""
+        mock_get_llm.return_value = fake_llm(
+            '```{"should_save": true, "user_facts": [], "company_facts": ["Uses SAP"], "confidence": 0.9}```'
+        )
+
+        decision = extract_memory("We run SAP.", "Noted.")
+
+        assert decision.company_facts == ["Uses SAP"]
+
 
 # =====================================================================
-# 10. Memory Writer — file I/O with deduplication (unit, temp files)
+# 10. Memory Writer — file I/O with deduplication (unit, fake filesystem)
 # =====================================================================
 
 class TestMemoryWriter:
-    """Test memory writer operations using temp directories."""
+    """Test memory writer operations on pyfakefs's in-memory filesystem."""
 
-    def test_append_facts_creates_content(self):
-        from src.app.memory.memory_writer import append_facts, read_memory
+    path = "/mem/TEST_MEMORY.md"
 
-        with tempfile.TemporaryDirectory() as tmpdir:
-            path = os.path.join(tmpdir, "TEST_MEMORY.md")
+    def _bullet_facts(self, path):
+        """Count each "- " bullet entry in a memory file, by exact text."""
+        return Counter(
+            line[2:].strip()
+            for line in read_memory(path).splitlines()
+            if line.startswith("- ")
+        )
+
+    def test_append_facts_creates_content(self, fs):
+        # Write initial content
+        fs.create_file(self.path, contents="# TEST MEMORY\n")
 
-            # Write initial content
-            with open(path, "w") as f:
-                f.write("# TEST MEMORY\n")
+        written = append_facts(self.path, ["User is a data scientist"])
+        assert written == 1
 
-            written = append_facts(path, ["User is a data scientist"])
-            assert written == 1
+        content = read_memory(self.path)
+        assert "User is a data scientist" in content
 
-            content = read_memory(path)
-            assert "User is a data scientist" in content
+    def test_append_facts_deduplicates(self, fs):
+        fs.create_file(self.path, contents="# TEST MEMORY\n")
 
-    def test_append_facts_deduplicates(self):
-        from src.app.memory.memory_writer import append_facts, read_memory
+        # Write same fact twice
+        append_facts(self.path, ["User prefers Python"])
+        written2 = append_facts(self.path, ["User prefers Python"])
 
-        with tempfile.TemporaryDirectory() as tmpdir:
-            path = os.path.join(tmpdir, "TEST_MEMORY.md")
+        assert written2 == 0  # second write should be deduped
 
-            with open(path, "w") as f:
-                f.write("# TEST MEMORY\n")
+        assert self._bullet_facts(self.path)["User prefers Python"] == 1
 
-            # Write same fact twice
-            append_facts(path, ["User prefers Python"])
-            written2 = append_facts(path, ["User prefers Python"])
+    def test_append_facts_dedup_is_case_insensitive_and_per_batch(self, fs):
+        fs.create_dir("/mem")
 
-            assert written2 == 0  # second write should be deduped
+        append_facts(self.path, ["User prefers Python"])
+        written = append_facts(self.path, ["user prefers python ", "Uses VS Code", "Uses VS Code"])
 
-            content = read_memory(path)
-            assert content.count("User prefers Python") == 1
+        assert written == 1
+        facts = self._bullet_facts(self.path)
+        assert facts["Uses VS Code"] == 1
+        assert set(facts) == {"User prefers Python", "Uses VS Code"}
 
-    def test_read_memory_nonexistent_file(self):
-        from src.app.memory.memory_writer import read_memory
+    def test_read_memory_tail_starts_at_full_line(self, fs):
+        fs.create_file(self.path, contents="- old fact one\n- old fact two\n- recent fact\n")
 
+        assert read_memory_tail(self.path, max_bytes=20) == "- recent fact\n"
+        assert read_memory_tail(self.path, max_bytes=1024).startswith("- old fact one")
+        assert read_memory_tail("/mem/missing.md") == ""
+
+    def test_read_memory_nonexistent_file(self, fs):
         content = read_memory("/nonexistent/path/MEMORY.md")
         assert content == ""
 
-    def test_append_empty_facts(self):
-        from src.app.memory.memory_writer import append_facts
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            path = os.path.join(tmpdir, "TEST_MEMORY.md")
-            written = append_facts(path, [])
-            assert written == 0
+    def test_append_empty_facts(self, fs):
+        fs.create_dir("/mem")
+        written = append_facts(self.path, [])
+        assert written == 0
 
 
 # =====================================================================
@@ -554,9 +1138,6 @@ class TestMemoryManager:
     @patch("src.app.memory.memory_manager.append_facts")
     @patch("src.app.memory.memory_manager.extract_memory")
     def test_process_memory_high_confidence(self, mock_extract, mock_append):
-        from src.app.memory.memory_manager import process_memory
-        from src.app.memory.memory_extractor import MemoryDecision
-
         mock_extract.return_value = MemoryDecision(
             should_save=True,
             user_facts=["Prefers morning meetings"],
@@ -573,9 +1154,6 @@ class TestMemoryManager:
     @patch("src.app.memory.memory_manager.append_facts")
     @patch("src.app.memory.memory_manager.extract_memory")
     def test_process_memory_low_confidence(self, mock_extract, mock_append):
-        from src.app.memory.memory_manager import process_memory
-        from src.app.memory.memory_extractor import MemoryDecision
-
         mock_extract.return_value = MemoryDecision(
             should_save=True,
             user_facts=["Something vague"],
@@ -591,9 +1169,6 @@ class TestMemoryManager:
     @patch("src.app.memory.memory_manager.append_facts")
     @patch("src.app.memory.memory_manager.extract_memory")
     def test_process_memory_should_save_false(self, mock_extract, mock_append):
-        from src.app.memory.memory_manager import process_memory
-        from src.app.memory.memory_extractor import MemoryDecision
-
         mock_extract.return_value = MemoryDecision(
             should_save=False,
             user_facts=[],
@@ -605,3 +1180,115 @@ class TestMemoryManager:
 
         assert result["memory_saved"] is False
         mock_append.assert_not_called()
+
+
+# =====================================================================
+# 12. Semantic Cache — near-duplicate query short-circuit (unit)
+# =====================================================================
+
+class _StubEmbeddings:
+    """Deterministic embeddings keyed by exact query text."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def embed_query(self, text):
+        return self.vectors[text]
+
+
+class TestSemanticCache:
+    """Test the SemanticCache with stubbed embeddings."""
+
+    def _make_cache(self, **kwargs):
+        vectors = {
+            "What is TinyLoRA?": [1.0, 0.0, 0.0],
+            "what is tinylora": [0.99, 0.05, 0.0],
+            "Who wrote the paper?": [0.0, 1.0, 0.0],
+            "Summarize the results.": [0.0, 0.0, 1.0],
+        }
+        return SemanticCache(embedding_model=_StubEmbeddings(vectors), **kwargs)
+
+    def test_empty_cache_misses(self):
+        cache = self._make_cache()
+        assert cache.lookup("What is TinyLoRA?") is None
+
+    def test_near_duplicate_hits(self):
+        cache = self._make_cache()
+        payload = {"answer": "A LoRA variant.", "citations": []}
+        cache.put("What is TinyLoRA?", payload)
+
+        assert cache.lookup("what is tinylora") == payload
+        assert cache.lookup("Who wrote the paper?") is None
+
+    def test_lru_eviction(self):
+        cache = self._make_cache(max_cache_size=2)
+        cache.put("What is TinyLoRA?", {"answer": "a", "citations": []})
+        cache.put("Who wrote the paper?", {"answer": "b", "citations": []})
+
+        # Touch the first entry so the second becomes least recently used
+        assert cache.lookup("What is TinyLoRA?") is not None
+        cache.put("Summarize the results.", {"answer": "c", "citations": []})
+
+        assert len(cache) == 2
+        assert cache.lookup("Who wrote the paper?") is None
+        assert cache.lookup("What is TinyLoRA?")["answer"] == "a"
+
+    def test_clear(self):
+        cache = self._make_cache()
+        cache.put("What is TinyLoRA?", {"answer": "a", "citations": []})
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.lookup("What is TinyLoRA?") is None
+
+
+# =====================================================================
+# 13. Embedding Cache — content-hash memoization (unit, temp SQLite)
+# =====================================================================
+
+class _CountingEmbeddings:
+    """Embeddings stub that records every text it is asked to embed."""
+
+    def __init__(self):
+        self.seen = []
+
+    def embed_documents(self, texts, **kwargs):
+        self.seen.extend(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text, **kwargs):
+        self.seen.append(text)
+        return [float(len(text)), 0.0]
+
+
+class TestEmbeddingCache:
+    """Test CachedEmbeddings against a temporary database."""
+
+    def test_repeat_texts_embedded_once(self, tmp_path):
+        inner = _CountingEmbeddings()
+        cached = CachedEmbeddings(inner, db_path=tmp_path / "emb.sqlite")
+
+        first = cached.embed_documents(["alpha", "beta", "alpha"])
+        second = cached.embed_documents(["beta", "gamma"])
+
+        assert first == [[5.0, 1.0], [4.0, 1.0], [5.0, 1.0]]
+        assert second == [[4.0, 1.0], [5.0, 1.0]]
+        assert inner.seen == ["alpha", "beta", "gamma"]
+
+    def test_vectors_persist_across_instances(self, tmp_path):
+        db_path = tmp_path / "emb.sqlite"
+        CachedEmbeddings(_CountingEmbeddings(), db_path=db_path).embed_documents(["alpha"])
+
+        inner = _CountingEmbeddings()
+        result = CachedEmbeddings(inner, db_path=db_path).embed_documents(["alpha"])
+
+        assert result == [[5.0, 1.0]]
+        assert inner.seen == []
+
+    def test_queries_cached_separately_from_documents(self, tmp_path):
+        inner = _CountingEmbeddings()
+        cached = CachedEmbeddings(inner, db_path=tmp_path / "emb.sqlite")
+
+        cached.embed_documents(["alpha"])
+        assert cached.embed_query("alpha") == [5.0, 0.0]
+        assert cached.embed_query("alpha") == [5.0, 0.0]
+        assert inner.seen == ["alpha", "alpha"]